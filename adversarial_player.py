@@ -1,12 +1,100 @@
-from game import Player
-from solver import SolveState
+from game import Player, unseen_tiles
+from solver import TranspositionCache, make_solver
 from collections import Counter
 import random
 
+# Lexicon of a worker process, set once by _init_worker so that it is not sent with every task,
+# and the worker's own cache of positions it has already evaluated this turn.
+_worker_lexicon = None
+_worker_cache = None
+_worker_turn = None
+
+
+def _init_worker(lexicon):
+    global _worker_lexicon, _worker_cache
+    _worker_lexicon = lexicon
+    _worker_cache = TranspositionCache(lexicon)
+
+
+def opponent_best_score(board, opponent_rack, lexicon_tree, cache=None):
+    """
+    Best score the opponent could make on `board` with `opponent_rack` (0 if no move is possible).
+    With a TranspositionCache (built for `lexicon_tree`), positions seen before are not solved again.
+    """
+    if cache is not None:
+        return cache.best_score(board, opponent_rack)
+    return make_solver(lexicon_tree, board, opponent_rack).best_score()
+
+
+def _evaluate_moves_in_worker(board, moves, opponent_rack, turn):
+    """Worker task: opponent potential after each of `moves`, tried in turn on the worker's copy of `board`."""
+    global _worker_turn
+    if turn != _worker_turn:
+        # Positions of earlier turns do not come up again
+        _worker_cache.clear()
+        _worker_turn = turn
+    potentials = []
+    for word, pos, direction, _, _ in moves:
+        placed = board.apply_move(word, pos, direction)
+        try:
+            potentials.append(opponent_best_score(board, opponent_rack, _worker_lexicon, _worker_cache))
+        finally:
+            board.undo_move(placed)
+    return potentials
+
 
 class AdversarialAIPlayer(Player):
     """AI player that tries to minimize opponent's potential scoring opportunities."""
 
+    # Tasks per worker process, so that uneven chunks still keep every worker busy.
+    CHUNKS_PER_WORKER = 4
+
+    def __init__(self, name, workers=1, endgame_time_limit=5.0):
+        """
+        Args:
+            name (str): Player name
+            workers (int): Processes used to evaluate candidate moves; 1 evaluates them in this process
+            endgame_time_limit (float): Seconds for the endgame solver once the bag is empty (None: never solve)
+        """
+        super().__init__(name)
+        self.workers = workers
+        self.endgame_time_limit = endgame_time_limit
+        self._pool = None
+        self._pool_lexicon = None
+        # Positions already evaluated this turn (see _get_cache), and the number of turns taken
+        self.cache = None
+        self.turn = 0
+
+    def _get_pool(self, lexicon_tree):
+        """Process pool whose workers hold `lexicon_tree`, started on first use and kept between turns."""
+        if self._pool is None or self._pool_lexicon is not lexicon_tree:
+            # Imported here because it is slow to import and only workers > 1 needs it
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.close()
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(lexicon_tree,))
+            self._pool_lexicon = lexicon_tree
+        return self._pool
+
+    def _get_cache(self, lexicon_tree):
+        """
+        Transposition cache for `lexicon_tree`, replaced if the game's lexicon changes.
+        It only pays off within a turn: the board fills up and the opponent's rack is
+        sampled again every turn, so earlier turns' positions do not come up again and
+        choose_move empties it.
+        """
+        if self.cache is None or self.cache.dictionary is not lexicon_tree:
+            self.cache = TranspositionCache(lexicon_tree)
+        return self.cache
+
+    def close(self):
+        """Shut down the worker processes, if any were started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_lexicon = None
+
     def _get_probable_opponent_rack(self, game_state):
         """
         Estimate the most probable tiles in opponent's rack based on remaining tiles.
@@ -17,26 +105,8 @@ class AdversarialAIPlayer(Player):
         Returns:
             list: Seven most probable tiles the opponent might have
         """
-        # Get original tile distribution
-        tile_dist = game_state['tile_distribution'].copy()
-
-        # Remove tiles that are on the board
-        board = game_state['board']
-        for pos in board.all_positions():
-            tile = board.get_tile(pos)
-            if tile:
-                if tile in tile_dist and tile_dist[tile] > 0:
-                    tile_dist[tile] -= 1
-
-        # Remove tiles that are in our rack
-        for tile in self.rack:
-            if tile in tile_dist and tile_dist[tile] > 0:
-                tile_dist[tile] -= 1
-
-        # Convert remaining distribution to list of tiles
-        remaining_tiles = []
-        for tile, count in tile_dist.items():
-            remaining_tiles.extend([tile] * count)
+        # Tiles in the bag or on the opponent's rack
+        remaining_tiles = unseen_tiles(game_state['board'], self.rack, game_state['tile_distribution'])
 
         # Select the 7 most frequent remaining tiles
         # (weighted random selection based on frequency)
@@ -79,16 +149,36 @@ class AdversarialAIPlayer(Player):
         Returns:
             int: Maximum potential score opponent could achieve
         """
-        # Create solver for opponent's turn
-        solver = SolveState(lexicon_tree, board, opponent_rack)
-        solver.find_all_options()
+        return opponent_best_score(board, opponent_rack, lexicon_tree, self._get_cache(lexicon_tree))
 
-        # If no moves available, return 0
-        if not solver.found_moves:
-            return 0
+    def _evaluate_moves(self, board, legal_moves, opponent_rack, lexicon_tree):
+        """
+        Opponent potential after each of `legal_moves`, in order.
 
-        # Return maximum possible score
-        return max(move[4] for move in solver.found_moves)
+        With more than one worker the moves are split into contiguous chunks that
+        are evaluated in the process pool and put back together in order, so the
+        result does not depend on the number of workers.
+
+        Returns:
+            list: One potential per legal move
+        """
+        if self.workers <= 1 or len(legal_moves) < 2:
+            # Try each possible move on the game board itself and take it back afterwards
+            potentials = []
+            for word, pos, direction, _, _ in legal_moves:
+                placed = board.apply_move(word, pos, direction)
+                try:
+                    potentials.append(self._evaluate_opponent_potential(board, opponent_rack, lexicon_tree))
+                finally:
+                    board.undo_move(placed)
+            return potentials
+
+        pool = self._get_pool(lexicon_tree)
+        chunk_count = min(len(legal_moves), self.workers * self.CHUNKS_PER_WORKER)
+        bounds = [len(legal_moves) * i // chunk_count for i in range(chunk_count + 1)]
+        futures = [pool.submit(_evaluate_moves_in_worker, board, legal_moves[start:end], opponent_rack, self.turn)
+                   for start, end in zip(bounds, bounds[1:])]
+        return [potential for future in futures for potential in future.result()]
 
     def choose_move(self, game_state):
         """
@@ -109,28 +199,26 @@ class AdversarialAIPlayer(Player):
         if not legal_moves:
             return 0
 
+        self.turn += 1
+        if self.cache is not None:
+            self.cache.clear()
+
         # Get probable opponent rack
         opponent_rack = self._get_probable_opponent_rack(game_state)
 
         best_move_index = 1  # Initialize to first move
         min_opponent_potential = float('inf')
 
-        # For each possible move we can make
-        for i, move in enumerate(legal_moves, 1):
-            # Create a copy of the board
-            test_board = game_state['board'].copy()
-
-            # Apply our move to the test board
-            word, pos, direction, rack_used, score = move
-            test_board.place_word(word, pos, direction, self.rack.copy())
-
-            # Evaluate opponent's potential after this move
-            opponent_potential = self._evaluate_opponent_potential(
-                test_board,
-                opponent_rack,
-                game_state.get('lexicon_tree')  # Add lexicon_tree to game_state in game.py
-            )
+        # Evaluate opponent's potential after each move
+        potentials = self._evaluate_moves(
+            game_state['board'],
+            legal_moves,
+            opponent_rack,
+            game_state.get('lexicon_tree')  # Add lexicon_tree to game_state in game.py
+        )
 
+        for i, (move, opponent_potential) in enumerate(zip(legal_moves, potentials), 1):
+            score = move[4]
             # Update best move if this leads to lower opponent potential
             # If opponent potentials are equal, prefer the move that scores more points for us
             if (opponent_potential < min_opponent_potential or
@@ -139,9 +227,10 @@ class AdversarialAIPlayer(Player):
                 best_move_index = i
 
         # Print the chosen move and reasoning for transparency
-        chosen_move = legal_moves[best_move_index - 1]
-        print(f"{self.name} chooses to play '{chosen_move[0]}' at {chosen_move[1]} "
-              f"({chosen_move[2]}) for {chosen_move[4]} points")
-        print(f"This move limits opponent's maximum potential score to {min_opponent_potential} points")
+        if self.verbose:
+            chosen_move = legal_moves[best_move_index - 1]
+            print(f"{self.name} chooses to play '{chosen_move[0]}' at {chosen_move[1]} "
+                  f"({chosen_move[2]}) for {chosen_move[4]} points")
+            print(f"This move limits opponent's maximum potential score to {min_opponent_potential} points")
 
         return best_move_index
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Alphagram index: every word of a lexicon filed under its letters in sorted
+order ("stare" -> "aerst"), so the words that use exactly a given set of tiles
+are one dictionary lookup, and the words formable from a rack are one lookup
+per distinct subset of the rack (at most 127 for seven tiles). Each blank in a
+subset multiplies its lookups by the number of letters it can stand for.
+"""
+from itertools import combinations, combinations_with_replacement
+
+from board import BLANK, Board
+from cross_check import ALPHABET
+
+
+def alphagram(letters):
+    return ''.join(sorted(letters))
+
+
+def lexicon_words(lexicon):
+    """
+    Every word of a lexicon, walked from its graph.
+
+    A GADDAG stores each word reversed along its separator-free path, so for
+    one the separator edges are skipped and the paths are read back to front.
+    """
+    from gaddag import SEPARATOR, Gaddag
+
+    reverse = isinstance(lexicon, Gaddag)
+    stack = [("", lexicon.root)]
+    while stack:
+        prefix, node = stack.pop()
+        if node.is_word and prefix:
+            yield prefix[::-1] if reverse else prefix
+        for letter, child in node.children.items():
+            if letter != SEPARATOR:
+                stack.append((prefix + letter, child))
+
+
+class AnagramIndex:
+    """Words grouped by alphagram, for rack queries that need no board."""
+
+    def __init__(self, words):
+        self.words_by_alphagram = dict()
+        for word in words:
+            self.words_by_alphagram.setdefault(alphagram(word), []).append(word)
+        for words in self.words_by_alphagram.values():
+            words.sort()
+
+    @classmethod
+    def for_lexicon(cls, lexicon):
+        """The index of `lexicon`'s words, built on first use and kept with the lexicon."""
+        index = getattr(lexicon, 'anagram_index', None)
+        if index is None:
+            index = cls(lexicon_words(lexicon))
+            lexicon.anagram_index = index
+        return index
+
+    def anagrams(self, letters):
+        """Words that use exactly `letters`."""
+        return self.words_by_alphagram.get(alphagram(letters), [])
+
+    def subanagrams(self, rack, min_length=2):
+        """
+        Words that can be made from some of the tiles in `rack`, blanks standing for any letter.
+
+        Returns:
+            list: Words, longest first, alphabetical within a length
+        """
+        letters = alphagram(tile for tile in rack if tile != BLANK)
+        blanks = len(rack) - len(letters)
+        words = []
+        for length in range(len(rack), min_length - 1, -1):
+            keys = set()
+            for blank_count in range(min(blanks, length) + 1):
+                # Combinations of the sorted rack are already alphagrams; repeated tiles give repeats.
+                for key in set(combinations(letters, length - blank_count)):
+                    if blank_count:
+                        keys.update(alphagram(key + fill)
+                                    for fill in combinations_with_replacement(ALPHABET, blank_count))
+                    else:
+                        keys.add(''.join(key))
+            found = [word for key in keys for word in self.words_by_alphagram.get(key, [])]
+            words.extend(sorted(found))
+        return words
+
+
+def blank_spellings(word, rack):
+    """
+    Every way to play `word` from `rack`, with the letters that have to come
+    from blanks in upper case. Blanks are only used for letters the rack lacks.
+    """
+    missing = list(word)
+    for tile in rack:
+        if tile != BLANK and tile in missing:
+            missing.remove(tile)
+    if not missing:
+        return [word]
+    spellings = []
+    # Choose which occurrences of each missing letter are blanks.
+    for positions in combinations(range(len(word)), len(missing)):
+        if sorted(word[i] for i in positions) == sorted(missing):
+            spellings.append(''.join(letter.upper() if i in positions else letter for i, letter in enumerate(word)))
+    return spellings
+
+
+def best_first_move(board, anagram_index, rack):
+    """
+    Highest-scoring opening move: every word formable from the rack, at every
+    position along the center row that covers the center square. Openings down
+    the center column mirror these and score the same.
+
+    Args:
+        board (Board): Empty board
+        anagram_index (AnagramIndex): Index of the game's lexicon
+        rack (list): Player's tiles
+
+    Returns:
+        tuple: (word, pos, direction, used_rack, score), or None if no word can be made
+    """
+    center = board.size // 2
+    letter_multipliers = board.letter_multipliers[center]
+    word_multipliers = board.word_multipliers[center]
+    best_move = None
+    for word in anagram_index.subanagrams(rack):
+        for spelling in blank_spellings(word, rack):
+            letter_scores = [Board.LETTER_SCORES[letter] for letter in spelling]
+            for col in range(max(0, center - len(word) + 1), min(center, board.size - len(word)) + 1):
+                # The board is empty, so there are no cross-words: this is calculate_score's main word.
+                word_multiplier = 1
+                main_score = 0
+                for offset, letter_score in enumerate(letter_scores):
+                    main_score += letter_score * letter_multipliers[col + offset]
+                    word_multiplier *= word_multipliers[col + offset]
+                score = main_score * word_multiplier + (Board.BINGO_BONUS if len(word) == 7 else 0)
+                if best_move is None or score > best_move[4]:
+                    used_rack = [BLANK if letter.isupper() else letter for letter in spelling]
+                    best_move = (spelling, (center, col), 'across', used_rack, score)
+    return best_move
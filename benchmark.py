@@ -0,0 +1,1024 @@
+import argparse
+import json
+import os
+import platform
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+from cross_check import CrossCheckCache
+from dawg import Dawg
+from letter_tree import LetterTree, build_tree_from_file
+from solver import PreparedBoard, SolverPool, make_solver, random_board
+
+
+def _read_words(file_name):
+    with open(file_name, 'rt') as file:
+        return sorted(line.strip() for line in file if line.strip())
+
+
+def _count_nodes(root):
+    """Count distinct nodes and edges reachable from root (shared nodes counted once)."""
+    seen = {id(root)}
+    stack = [root]
+    edges = 0
+    while stack:
+        node = stack.pop()
+        edges += len(node.children)
+        for child in node.children.values():
+            if id(child) not in seen:
+                seen.add(id(child))
+                stack.append(child)
+    return len(seen), edges
+
+
+def _measure_build(build, words):
+    tracemalloc.start()
+    start = time.perf_counter()
+    lexicon = build(words)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return lexicon, elapsed, current, peak
+
+
+def compare_lexicon_builds(file_name):
+    """Build the per-node trie and the minimized DAWG from the same word list and compare them."""
+    words = _read_words(file_name)
+    print(f"{file_name}: {len(words)} words")
+    print(f"{'structure':<12}{'build (s)':>12}{'retained (MB)':>16}{'peak (MB)':>12}{'nodes':>12}{'edges':>12}")
+    results = {}
+    for name, build in [('trie', LetterTree), ('dawg', Dawg)]:
+        lexicon, elapsed, current, peak = _measure_build(build, words)
+        nodes, edges = _count_nodes(lexicon.root)
+        results[name] = lexicon
+        print(f"{name:<12}{elapsed:>12.3f}{current / 2**20:>16.1f}{peak / 2**20:>12.1f}{nodes:>12}{edges:>12}")
+
+    mismatches = [word for word in words if not results['dawg'].is_word(word)]
+    if mismatches:
+        raise AssertionError(f"DAWG is missing {len(mismatches)} words, e.g. {mismatches[:5]}")
+
+
+def compare_lexicon_loads(text_file, compiled_file):
+    """Time loading the same lexicon from its word list and from its compiled, memory-mapped form."""
+    words = _read_words(text_file)
+    for file_name in [text_file, compiled_file]:
+        start = time.perf_counter()
+        lexicon = build_tree_from_file(file_name)
+        elapsed = time.perf_counter() - start
+        print(f"{file_name:<32}{elapsed * 1000:>10.1f} ms")
+    mismatches = [word for word in words if not lexicon.is_word(word)]
+    if mismatches:
+        raise AssertionError(f"{compiled_file} is missing {len(mismatches)} words, e.g. {mismatches[:5]}")
+
+
+def _canonical_moves(moves):
+    return Counter((word, pos, direction, tuple(sorted(used)), score) for word, pos, direction, used, score in moves)
+
+
+def compare_engines(lexicon_file, gaddag_file, seeds, num_moves):
+    """
+    Check that the Appel-Jacobson and GADDAG generators return identical moves on
+    seeded random boards, and report the throughput of each in moves per second.
+    """
+    engines = [('appel-jacobson', build_tree_from_file(lexicon_file)), ('gaddag', build_tree_from_file(gaddag_file))]
+    positions = [random_board(engines[0][1], seed, num_moves) for seed in seeds]
+    # Warm up so that lazily decoded compiled nodes are not charged to the first boards.
+    for _, lexicon in engines:
+        for board, rack in positions:
+            make_solver(lexicon, board, rack.copy()).find_all_options()
+
+    totals = {name: [0, 0.0] for name, _ in engines}
+    for seed, (board, rack) in zip(seeds, positions):
+        results = []
+        for name, lexicon in engines:
+            solver = make_solver(lexicon, board, rack.copy())
+            start = time.perf_counter()
+            solver.find_all_options()
+            totals[name][1] += time.perf_counter() - start
+            totals[name][0] += len(solver.found_moves)
+            results.append(_canonical_moves(solver.found_moves))
+        if results[0] != results[1]:
+            only_first = list((results[0] - results[1]).elements())[:5]
+            only_second = list((results[1] - results[0]).elements())[:5]
+            raise AssertionError(f"Engines disagree on seed {seed}: {only_first} vs {only_second}")
+
+    print(f"{len(seeds)} boards, engines agree on every move")
+    for name, (count, elapsed) in totals.items():
+        print(f"{name:<16}{count:>10} moves{elapsed:>10.2f} s{count / elapsed:>12.0f} moves/s")
+
+
+def compare_cross_check_cache(lexicon_file, seeds, num_moves):
+    """
+    Play seeded random games, checking after every move that the incrementally
+    maintained cross-checks and anchors match a from-scratch computation, and
+    compare per-turn solve time with the cache kept against rebuilding it.
+    """
+    lexicon = build_tree_from_file(lexicon_file)
+    incremental_time = rebuilt_time = 0.0
+    turns = 0
+    for seed in seeds:
+        board, rack = random_board(lexicon, seed, 0)
+        for _ in range(num_moves):
+            fresh = CrossCheckCache(lexicon, board)
+            cache = CrossCheckCache.for_board(board, lexicon)
+            for direction in ['across', 'down']:
+                if cache.cross_checks(direction) != fresh.cross_checks(direction):
+                    raise AssertionError(f"Cross-checks diverged on seed {seed} ({direction})")
+            if cache.anchor_list() != fresh.anchor_list():
+                raise AssertionError(f"Anchors diverged on seed {seed}")
+
+            start = time.perf_counter()
+            board.cross_check_cache = None
+            solver = make_solver(lexicon, board, rack.copy())
+            solver.find_all_options()
+            rebuilt_time += time.perf_counter() - start
+            if not solver.found_moves:
+                break
+
+            # Play a move so that the cache has to catch up with it, then time a warm solve.
+            word, pos, direction, _, _ = solver.found_moves[seed % len(solver.found_moves)]
+            _, rack = board.place_word(word, pos, direction, rack)
+            rack = rack + list('etaoinsr')[:7 - len(rack)]
+            start = time.perf_counter()
+            make_solver(lexicon, board, rack.copy()).find_all_options()
+            incremental_time += time.perf_counter() - start
+            turns += 1
+
+    print(f"{turns} turns, incremental cross-checks match a full rebuild after every move")
+    print(f"{'full rebuild':<16}{rebuilt_time / turns * 1000:>10.2f} ms/turn")
+    print(f"{'incremental':<16}{incremental_time / turns * 1000:>10.2f} ms/turn")
+
+
+def check_move_scores(lexicon_files, seeds, num_moves):
+    """Check that the scores accumulated during generation equal Board.calculate_score for every move."""
+    for lexicon_file in lexicon_files:
+        lexicon = build_tree_from_file(lexicon_file)
+        checked = 0
+        for seed in seeds:
+            board, rack = random_board(lexicon, seed, num_moves)
+            solver = make_solver(lexicon, board, rack.copy())
+            solver.find_all_options()
+            for word, pos, direction, used_rack, score in solver.found_moves:
+                expected = board.calculate_score(word, pos, direction, used_rack)
+                if score != expected:
+                    raise AssertionError(f"{lexicon_file} seed {seed}: '{word}' at {pos} {direction} "
+                                         f"scored {score}, calculate_score gives {expected}")
+            checked += len(solver.found_moves)
+        print(f"{lexicon_file}: {checked} move scores match calculate_score")
+
+
+def benchmark_solver(lexicon_file, seeds, num_moves, repeat):
+    """Time move generation on seeded boards with their cross-check caches already warm."""
+    lexicon = build_tree_from_file(lexicon_file)
+    positions = [random_board(lexicon, seed, num_moves) for seed in seeds]
+    for board, rack in positions:
+        make_solver(lexicon, board, rack.copy()).find_all_options()
+
+    # Report the fastest round; the slower ones mostly measure noise from other processes.
+    rounds = []
+    for _ in range(repeat):
+        move_count = 0
+        start = time.perf_counter()
+        for board, rack in positions:
+            solver = make_solver(lexicon, board, rack.copy())
+            solver.find_all_options()
+            move_count += len(solver.found_moves)
+        rounds.append(time.perf_counter() - start)
+    best = min(rounds)
+    print(f"{len(positions)} boards on {lexicon_file}, best of {repeat}: "
+          f"{best / len(positions) * 1000:.2f} ms/solve, {move_count / best:.0f} moves/s")
+
+
+def benchmark_board_states(lexicon_file, seeds, num_moves):
+    """Measure how many board states per second copy() and apply_move / undo_move can produce."""
+    lexicon = build_tree_from_file(lexicon_file)
+    positions = []
+    for seed in seeds:
+        board, rack = random_board(lexicon, seed, num_moves)
+        solver = make_solver(lexicon, board, rack.copy())
+        solver.find_all_options()
+        positions.append((board, solver.found_moves))
+    move_count = sum(len(moves) for _, moves in positions)
+
+    start = time.perf_counter()
+    for board, moves in positions:
+        for word, pos, direction, _, _ in moves:
+            board.copy().apply_move(word, pos, direction)
+    copy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for board, moves in positions:
+        for word, pos, direction, _, _ in moves:
+            board.undo_move(board.apply_move(word, pos, direction))
+    in_place_elapsed = time.perf_counter() - start
+
+    print(f"{move_count} candidate moves on {len(positions)} boards")
+    print(f"{'copy + apply':<16}{move_count / copy_elapsed:>12.0f} states/s")
+    print(f"{'apply + undo':<16}{move_count / in_place_elapsed:>12.0f} states/s")
+
+
+def compare_lookahead(lexicon_file, seeds, num_moves):
+    """
+    Time AdversarialAIPlayer-style lookahead (one opponent solve per candidate
+    move) done by copying the board against apply_move / undo_move on one board,
+    checking that both give the same opponent potentials and leave the cache intact.
+    """
+    from adversarial_player import AdversarialAIPlayer, opponent_best_score
+    from game import ScrabbleBag
+
+    lexicon = build_tree_from_file(lexicon_file)
+    player = AdversarialAIPlayer("Benchmark")
+    copy_elapsed = in_place_elapsed = 0.0
+    candidates = 0
+    for seed in seeds:
+        board, rack = random_board(lexicon, seed, num_moves)
+        solver = make_solver(lexicon, board, rack.copy())
+        solver.find_all_options()
+        player.rack = rack
+        random.seed(seed)
+        opponent_rack = player._get_probable_opponent_rack(
+            {'board': board, 'tile_distribution': ScrabbleBag.TILE_DISTRIBUTION})
+        candidates += len(solver.found_moves)
+
+        start = time.perf_counter()
+        copied = []
+        for word, pos, direction, _, _ in solver.found_moves:
+            test_board = board.copy()
+            test_board.place_word(word, pos, direction, rack.copy())
+            copied.append(opponent_best_score(test_board, opponent_rack, lexicon))
+        copy_elapsed += time.perf_counter() - start
+
+        start = time.perf_counter()
+        in_place = []
+        for word, pos, direction, _, _ in solver.found_moves:
+            placed = board.apply_move(word, pos, direction)
+            in_place.append(opponent_best_score(board, opponent_rack, lexicon))
+            board.undo_move(placed)
+        in_place_elapsed += time.perf_counter() - start
+
+        if copied != in_place:
+            raise AssertionError(f"Lookahead results differ on seed {seed}")
+        fresh = CrossCheckCache(lexicon, board)
+        cache = board.cross_check_cache
+        if any(cache.cross_checks(direction) != fresh.cross_checks(direction) or
+               cache.cross_word_scores(direction) != fresh.cross_word_scores(direction)
+               for direction in ['across', 'down']) or cache.anchor_list() != fresh.anchor_list():
+            raise AssertionError(f"Cross-check cache not restored on seed {seed}")
+
+    print(f"{candidates} candidate moves on {len(seeds)} boards, identical opponent potentials")
+    print(f"{'copy board':<16}{copy_elapsed:>10.2f} s{candidates / copy_elapsed:>10.0f} candidates/s")
+    print(f"{'apply / undo':<16}{in_place_elapsed:>10.2f} s{candidates / in_place_elapsed:>10.0f} candidates/s")
+
+
+def compare_streaming(lexicon_files, seeds, num_moves, k):
+    """
+    Check best_move / top_moves against full enumeration on seeded boards and
+    time collecting every move against keeping only the best ones.
+    """
+    for lexicon_file in lexicon_files:
+        lexicon = build_tree_from_file(lexicon_file)
+        positions = [random_board(lexicon, seed, num_moves) for seed in seeds]
+        for board, rack in positions:
+            make_solver(lexicon, board, rack.copy()).find_all_options()
+
+        timings = {'all moves': 0.0, 'iter_moves': 0.0, f'top {k}': 0.0, 'best move': 0.0}
+        for seed, (board, rack) in zip(seeds, positions):
+            start = time.perf_counter()
+            solver = make_solver(lexicon, board, rack.copy())
+            solver.find_all_options()
+            all_moves = solver.found_moves
+            timings['all moves'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            streamed = list(make_solver(lexicon, board, rack.copy()).iter_moves())
+            timings['iter_moves'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            top = make_solver(lexicon, board, rack.copy()).top_moves(k)
+            timings[f'top {k}'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            best = make_solver(lexicon, board, rack.copy()).best_move()
+            timings['best move'] += time.perf_counter() - start
+
+            if streamed != all_moves:
+                raise AssertionError(f"iter_moves differs from find_all_options on seed {seed}")
+            expected_scores = sorted((move[4] for move in all_moves), reverse=True)[:k]
+            if [move[4] for move in top] != expected_scores:
+                raise AssertionError(f"top_moves({k}) scores {[move[4] for move in top]} "
+                                     f"!= {expected_scores} on seed {seed}")
+            if any(_canonical_moves([move]) - _canonical_moves(all_moves) for move in top):
+                raise AssertionError(f"top_moves({k}) returned a move not in the full list on seed {seed}")
+            if (best[4] if best else None) != (expected_scores[0] if expected_scores else None):
+                raise AssertionError(f"best_move {best} disagrees with full enumeration on seed {seed}")
+
+        print(f"{lexicon_file}: {len(seeds)} boards, best and top {k} match full enumeration")
+        for name, elapsed in timings.items():
+            print(f"  {name:<14}{elapsed:>10.3f} s")
+
+
+def compare_parallel_lookahead(lexicon_file, seeds, num_moves, worker_counts):
+    """
+    Time AdversarialAIPlayer's candidate evaluation with different numbers of
+    worker processes, checking that every worker count gives the same potentials.
+    """
+    from adversarial_player import AdversarialAIPlayer
+    from game import ScrabbleBag
+
+    lexicon = build_tree_from_file(lexicon_file)
+    positions = []
+    for seed in seeds:
+        board, rack = random_board(lexicon, seed, num_moves)
+        solver = make_solver(lexicon, board, rack.copy())
+        solver.find_all_options()
+        player = AdversarialAIPlayer("Benchmark")
+        player.rack = rack
+        random.seed(seed)
+        opponent_rack = player._get_probable_opponent_rack(
+            {'board': board, 'tile_distribution': ScrabbleBag.TILE_DISTRIBUTION})
+        positions.append((board, solver.found_moves, opponent_rack))
+    candidates = sum(len(moves) for _, moves, _ in positions)
+
+    print(f"{candidates} candidate moves on {len(seeds)} boards, {os.cpu_count()} CPUs")
+    expected = None
+    serial_elapsed = None
+    for workers in worker_counts:
+        player = AdversarialAIPlayer("Benchmark", workers=workers)
+        try:
+            # Start the pool outside the timed region; it is kept between turns in a game.
+            board, moves, opponent_rack = positions[0]
+            player._evaluate_moves(board, moves[:2], opponent_rack, lexicon)
+            start = time.perf_counter()
+            results = [player._evaluate_moves(board, moves, opponent_rack, lexicon)
+                       for board, moves, opponent_rack in positions]
+            elapsed = time.perf_counter() - start
+        finally:
+            player.close()
+        if expected is None:
+            expected, serial_elapsed = results, elapsed
+        elif results != expected:
+            raise AssertionError(f"{workers} workers gave different opponent potentials")
+        print(f"{workers:>3} workers{elapsed:>10.2f} s{candidates / elapsed:>10.0f} candidates/s"
+              f"{serial_elapsed / elapsed:>8.2f}x")
+
+
+def compare_solver_pool(lexicon_file, seeds, num_moves, worker_counts):
+    """
+    Time SolverPool against the serial solver on seeded boards, checking that
+    it returns exactly the serial move list for every worker count.
+    """
+    lexicon = build_tree_from_file(lexicon_file)
+    positions = [random_board(lexicon, seed, num_moves) for seed in seeds]
+    expected = []
+    start = time.perf_counter()
+    for board, rack in positions:
+        solver = make_solver(lexicon, board, rack.copy())
+        solver.find_all_options()
+        expected.append(solver.found_moves)
+    serial_elapsed = time.perf_counter() - start
+
+    print(f"{sum(len(moves) for moves in expected)} moves on {len(seeds)} boards, {os.cpu_count()} CPUs")
+    print(f"{'serial':<12}{serial_elapsed:>10.2f} s")
+    for workers in worker_counts:
+        with SolverPool(lexicon, workers) as pool:
+            # Start the workers outside the timed region; a pool is meant to be kept for many positions.
+            pool.find_all_options(*positions[0])
+            start = time.perf_counter()
+            results = [pool.find_all_options(board, rack) for board, rack in positions]
+            elapsed = time.perf_counter() - start
+        if results != expected:
+            raise AssertionError(f"SolverPool with {workers} workers differs from the serial solver")
+        print(f"{f'{workers} workers':<12}{elapsed:>10.2f} s{serial_elapsed / elapsed:>8.2f}x")
+
+
+def benchmark_leave_lookups(lexicon_file, leave_table_file, seeds, num_moves):
+    """Time equity scoring (score + leave value) of every generated move against move generation itself."""
+    from equity_player import EquityAIPlayer
+
+    lexicon = build_tree_from_file(lexicon_file)
+    player = EquityAIPlayer("Benchmark", leave_table_file)
+    solve_elapsed = equity_elapsed = 0.0
+    move_count = 0
+    for seed in seeds:
+        board, rack = random_board(lexicon, seed, num_moves)
+        start = time.perf_counter()
+        solver = make_solver(lexicon, board, rack.copy())
+        solver.find_all_options()
+        solve_elapsed += time.perf_counter() - start
+
+        player.rack = rack
+        start = time.perf_counter()
+        for move in solver.found_moves:
+            player.move_equity(move)
+        equity_elapsed += time.perf_counter() - start
+        move_count += len(solver.found_moves)
+
+    print(f"{move_count} moves on {len(seeds)} boards")
+    print(f"{'generation':<16}{solve_elapsed:>10.3f} s")
+    print(f"{'equity scoring':<16}{equity_elapsed:>10.3f} s{equity_elapsed / move_count * 1e6:>10.2f} us/move"
+          f"{equity_elapsed / solve_elapsed:>8.1%} of generation")
+
+
+def benchmark_anagrams(lexicon_files, racks):
+    """
+    Check AnagramIndex.subanagrams against brute-force permutations of random
+    racks, and time the index build, rack queries and best_first_move.
+    """
+    from itertools import permutations
+
+    from anagram import AnagramIndex, best_first_move
+    from board import Board
+    from game import ScrabbleBag
+
+    rng = random.Random(0)
+    tiles = [letter for letter, count in ScrabbleBag.TILE_DISTRIBUTION.items() for _ in range(count)]
+    sample_racks = [rng.sample(tiles, 7) for _ in range(racks)]
+    for lexicon_file in lexicon_files:
+        lexicon = build_tree_from_file(lexicon_file)
+        start = time.perf_counter()
+        index = AnagramIndex.for_lexicon(lexicon)
+        build_elapsed = time.perf_counter() - start
+
+        brute_elapsed = query_elapsed = opening_elapsed = 0.0
+        board = Board(15)
+        for rack in sample_racks:
+            start = time.perf_counter()
+            expected = {''.join(perm) for length in range(2, 8) for perm in permutations(rack, length)
+                        if lexicon.is_word(''.join(perm))}
+            brute_elapsed += time.perf_counter() - start
+
+            start = time.perf_counter()
+            words = index.subanagrams(rack)
+            query_elapsed += time.perf_counter() - start
+
+            start = time.perf_counter()
+            best_first_move(board, index, rack)
+            opening_elapsed += time.perf_counter() - start
+
+            if set(words) != expected or len(words) != len(expected):
+                raise AssertionError(f"subanagrams({''.join(rack)}) differs from brute force")
+
+        print(f"{lexicon_file}: {len(index.words_by_alphagram)} alphagrams, "
+              f"subanagrams match brute force on {racks} racks")
+        print(f"  {'index build':<22}{build_elapsed * 1000:>10.1f} ms")
+        for name, elapsed in [('permutations + is_word', brute_elapsed), ('subanagrams', query_elapsed),
+                              ('best_first_move', opening_elapsed)]:
+            print(f"  {name:<22}{elapsed / racks * 1000:>10.3f} ms/rack")
+
+
+def compare_blank_racks(lexicon_files, seeds, num_moves):
+    """
+    Check that racks with blanks generate exactly the moves found by trying
+    every letter in place of each blank, and time solving with zero, one and
+    two blanks on the rack relative to no blanks.
+
+    The time is not bounded by a constant factor: each blank can stand for any
+    letter, so the number of legal moves itself grows several times over per
+    blank. What the generator controls is the cost per move found, printed
+    next to the move and time factors.
+    """
+    from board import BLANK
+    from cross_check import ALPHABET
+
+    for lexicon_file in lexicon_files:
+        lexicon = build_tree_from_file(lexicon_file)
+        positions = []
+        for seed in seeds:
+            board, rack = random_board(lexicon, seed, num_moves)
+            letters = [tile for tile in rack if tile != BLANK][:5]
+            positions.append((board, letters))
+        for board, letters in positions:
+            make_solver(lexicon, board, letters + ['e', 's']).find_all_options()
+
+        timings = dict()
+        for blanks in range(3):
+            elapsed = 0.0
+            move_count = 0
+            for seed, (board, letters) in zip(seeds, positions):
+                # Blanks replace the rack's last tiles, so every rack has seven tiles.
+                rack = letters + ['e', 's'][:2 - blanks] + [BLANK] * blanks
+                solver = make_solver(lexicon, board, rack)
+                start = time.perf_counter()
+                solver.find_all_options()
+                elapsed += time.perf_counter() - start
+                move_count += len(solver.found_moves)
+
+                if blanks == 1:
+                    expected = set()
+                    for letter in ALPHABET:
+                        substitute = make_solver(lexicon, board, letters + ['e', letter])
+                        substitute.find_all_options()
+                        expected.update((word.lower(), pos, direction)
+                                        for word, pos, direction, _, _ in substitute.found_moves)
+                    found = {(word.lower(), pos, direction) for word, pos, direction, _, _ in solver.found_moves}
+                    if found != expected:
+                        raise AssertionError(f"Blank moves differ from letter substitution on seed {seed}: "
+                                             f"{sorted(found ^ expected)[:5]}")
+            timings[blanks] = (move_count, elapsed)
+
+        print(f"{lexicon_file}: {len(seeds)} boards, one-blank moves match letter substitution")
+        for blanks, (move_count, elapsed) in timings.items():
+            print(f"  {blanks} blanks{move_count:>10} moves{move_count / timings[0][0]:>8.1f}x"
+                  f"{elapsed:>10.2f} s{elapsed / timings[0][1]:>8.1f}x"
+                  f"{elapsed / move_count * 1e6:>10.1f} us/move"
+                  f"{elapsed / move_count / (timings[0][1] / timings[0][0]):>8.1f}x")
+
+
+def compare_transposition_cache(lexicon_file, seeds, num_moves):
+    """
+    Time AdversarialAIPlayer's candidate evaluation with and without its
+    TranspositionCache, one turn per board with the cache emptied between
+    turns as choose_move does, checking that both give the same potentials.
+    The hit rate is therefore the within-turn one (the same board reached by
+    different moves, such as a one-tile play found both across and down).
+    """
+    from adversarial_player import AdversarialAIPlayer, opponent_best_score
+    from game import ScrabbleBag
+
+    lexicon = build_tree_from_file(lexicon_file)
+    positions = []
+    for seed in seeds:
+        board, rack = random_board(lexicon, seed, num_moves)
+        solver = make_solver(lexicon, board, rack.copy())
+        solver.find_all_options()
+        player = AdversarialAIPlayer("Benchmark")
+        player.rack = rack
+        random.seed(seed)
+        opponent_rack = player._get_probable_opponent_rack(
+            {'board': board, 'tile_distribution': ScrabbleBag.TILE_DISTRIBUTION})
+        positions.append((board, solver.found_moves, opponent_rack))
+    candidates = sum(len(moves) for _, moves, _ in positions)
+
+    def evaluate(potential, start_turn):
+        results = []
+        for board, moves, opponent_rack in positions:
+            start_turn()
+            for word, pos, direction, _, _ in moves:
+                placed = board.apply_move(word, pos, direction)
+                results.append(potential(board, opponent_rack))
+                board.undo_move(placed)
+        return results
+
+    start = time.perf_counter()
+    expected = evaluate(lambda board, rack: opponent_best_score(board, rack, lexicon), lambda: None)
+    uncached_elapsed = time.perf_counter() - start
+
+    player = AdversarialAIPlayer("Benchmark")
+    cache = player._get_cache(lexicon)
+    start = time.perf_counter()
+    results = evaluate(lambda board, rack: player._evaluate_opponent_potential(board, rack, lexicon), cache.clear)
+    cached_elapsed = time.perf_counter() - start
+    if results != expected:
+        raise AssertionError("Cached opponent potentials differ")
+
+    print(f"{candidates} candidate evaluations (one turn on each of {len(seeds)} boards), identical potentials")
+    print(f"{'no cache':<12}{uncached_elapsed:>10.2f} s")
+    print(f"{'cache':<12}{cached_elapsed:>10.2f} s{uncached_elapsed / cached_elapsed:>8.2f}x  "
+          f"within-turn hit rate {cache.hit_rate:.1%}, {cache.evictions} evictions")
+
+
+def compare_prepared_boards(lexicon_files, seeds, num_moves, racks):
+    """
+    Time solving many racks on one position with a fresh solver per rack
+    against a PreparedBoard shared by all of them, checking that both find the
+    same moves and best moves.
+    """
+    from game import ScrabbleBag
+
+    for lexicon_file in lexicon_files:
+        lexicon = build_tree_from_file(lexicon_file)
+        positions = []
+        for seed in seeds:
+            board, _ = random_board(lexicon, seed, num_moves)
+            rng = random.Random(seed)
+            tiles = [letter for letter, count in ScrabbleBag.TILE_DISTRIBUTION.items() for _ in range(count)]
+            samples = []
+            for _ in range(racks):
+                rng.shuffle(tiles)
+                samples.append(tiles[:7])
+            positions.append((board, samples))
+            # Warm the cross-check cache, which both ways share.
+            make_solver(lexicon, board, []).find_all_options()
+
+        timings = {}
+        for name, solve in [('fresh solver', lambda board, rack: make_solver(lexicon, board, rack)),
+                            ('prepared board', None)]:
+            all_moves = []
+            best_moves = []
+            start = time.perf_counter()
+            for board, samples in positions:
+                prepared = PreparedBoard(lexicon, board)
+                for rack in samples:
+                    solver = solve(board, rack.copy()) if solve else prepared.solver(rack.copy())
+                    best_moves.append(solver.best_move())
+            best_elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            for board, samples in positions:
+                prepared = PreparedBoard(lexicon, board)
+                for rack in samples:
+                    solver = solve(board, rack.copy()) if solve else prepared.solver(rack.copy())
+                    solver.find_all_options()
+                    all_moves.append(_canonical_moves(solver.found_moves))
+            all_elapsed = time.perf_counter() - start
+            timings[name] = (all_elapsed, best_elapsed, all_moves, best_moves)
+
+        fresh, prepared = timings['fresh solver'], timings['prepared board']
+        if fresh[2] != prepared[2] or [move and move[4] for move in fresh[3]] != [move and move[4] for move in prepared[3]]:
+            raise AssertionError(f"{lexicon_file}: prepared boards find different moves")
+        solves = len(seeds) * racks
+        print(f"{lexicon_file}: {racks} racks on each of {len(seeds)} boards, identical moves")
+        for name, (all_elapsed, best_elapsed, _, _) in timings.items():
+            print(f"  {name:<16}all moves {all_elapsed / solves * 1000:>7.2f} ms/rack"
+                  f"   best move {best_elapsed / solves * 1000:>7.2f} ms/rack")
+
+
+def compare_expectimax_pruning(lexicon_file, seeds, num_moves, depths):
+    """
+    Run ExpectimaxSearch to a fixed depth with and without its pruning on seeded
+    boards, checking that both choose the same move with the same value.
+    """
+    from game import unseen_tiles
+    from search import ExpectimaxSearch
+
+    lexicon = build_tree_from_file(lexicon_file)
+    positions = []
+    for seed in seeds:
+        board, rack = random_board(lexicon, seed, num_moves)
+        solver = make_solver(lexicon, board, rack.copy())
+        solver.find_all_options()
+        positions.append((seed, board, rack, solver.found_moves))
+
+    for depth in depths:
+        totals = {}
+        for prune in [False, True]:
+            solves = pruned = 0
+            elapsed = 0.0
+            choices = []
+            for seed, board, rack, moves in positions:
+                search = ExpectimaxSearch(lexicon, board, rack, unseen_tiles(board, rack), rng=random.Random(seed))
+                search.prune = prune
+                result = search.search(moves, max_depth=depth)
+                solves += result.solves
+                pruned += result.pruned
+                elapsed += result.seconds
+                choices.append((result.index, result.value))
+            totals[prune] = (solves, pruned, elapsed, choices)
+        if totals[False][3] != totals[True][3]:
+            raise AssertionError(f"Pruning changed the choice at depth {depth}")
+        print(f"depth {depth}: {len(positions)} boards, same choices with and without pruning")
+        for prune, (solves, pruned, elapsed, _) in totals.items():
+            print(f"  {'pruned' if prune else 'full':<8}{solves:>8} solves{pruned:>6} cut{elapsed:>10.2f} s"
+                  f"{elapsed / len(positions):>8.2f} s/turn")
+
+
+def _exact_endgame_value(lexicon, board, rack, other_rack, passed, memo):
+    """Game value of an endgame by exhaustive (memoized) minimax, as a reference for EndgameSolver."""
+    from game import rack_value
+
+    key = board.zobrist_hash, ''.join(sorted(rack)), ''.join(sorted(other_rack)), passed
+    if key in memo:
+        return memo[key]
+    solver = make_solver(lexicon, board, list(rack))
+    solver.find_all_options()
+    if not solver.found_moves:
+        if passed:
+            value = rack_value(other_rack) - rack_value(rack)
+        else:
+            value = -_exact_endgame_value(lexicon, board, other_rack, rack, True, memo)
+    else:
+        value = None
+        for word, pos, direction, used_rack, score in solver.found_moves:
+            leave = list(rack)
+            for tile in used_rack:
+                leave.remove(tile)
+            if not leave:
+                move_value = score + 2 * rack_value(other_rack)
+            else:
+                placed = board.apply_move(word, pos, direction)
+                move_value = score - _exact_endgame_value(lexicon, board, other_rack, leave, False, memo)
+                board.undo_move(placed)
+            if value is None or move_value > value:
+                value = move_value
+    memo[key] = value
+    return value
+
+
+def compare_endgames(lexicon_file, seeds, max_tiles, time_limit, check):
+    """
+    Solve seeded endgames with EndgameSolver. With `check`, every solved value
+    is compared with exhaustive minimax, and so is the value of the greedy
+    (highest-scoring) move, to show what solving gains over it.
+    """
+    from endgame import EndgameSolver, random_endgame
+    from game import rack_value
+
+    lexicon = build_tree_from_file(lexicon_file)
+    count = solved = 0
+    elapsed = 0.0
+    nodes = 0
+    gains = []
+    for seed in seeds:
+        position = random_endgame(lexicon, seed, max_tiles)
+        if position is None:
+            continue
+        board, rack, opponent_rack = position
+        count += 1
+        result = EndgameSolver(lexicon, board, rack, opponent_rack).solve(time_limit)
+        solved += result.solved
+        elapsed += result.seconds
+        nodes += result.nodes
+        print(f"seed {seed}: {''.join(rack)} against {''.join(opponent_rack)}, "
+              f"{'solved' if result.solved else f'depth {result.depth}'} value {result.value:+}, "
+              f"{result.nodes} nodes, {result.seconds:.2f} s: {' '.join(move[0] if move else '-' for move in result.line)}")
+        if check and result.solved:
+            memo = dict()
+            exact = _exact_endgame_value(lexicon, board, rack, opponent_rack, False, memo)
+            if exact != result.value:
+                raise AssertionError(f"seed {seed}: solver value {result.value}, exhaustive {exact}")
+            greedy = make_solver(lexicon, board, list(rack)).best_move()
+            leave = list(rack)
+            for tile in greedy[3]:
+                leave.remove(tile)
+            if leave:
+                placed = board.apply_move(greedy[0], greedy[1], greedy[2])
+                greedy_value = greedy[4] - _exact_endgame_value(lexicon, board, opponent_rack, leave, False, memo)
+                board.undo_move(placed)
+            else:
+                greedy_value = greedy[4] + 2 * rack_value(opponent_rack)
+            gains.append(result.value - greedy_value)
+    count = max(count, 1)
+    print(f"{solved} of {count} solved, {nodes / count:.0f} nodes and {elapsed / count:.2f} s per endgame")
+    if check:
+        print(f"solved values match exhaustive search; solving gains {sum(gains) / max(len(gains), 1):+.1f} "
+              f"points over the greedy move on average ({sum(gain > 0 for gain in gains)} of {len(gains)} improved)")
+
+
+def _timed_run(run, repeat):
+    """
+    Best wall time of `repeat` runs, then one more run under tracemalloc for the
+    peak allocation (tracing slows the run down too much to time it as well).
+
+    Returns:
+        tuple: (seconds, peak bytes, what the last run returned)
+    """
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        rounds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(rounds), peak, result
+
+
+def run_suite(lexicon_files, solve_lexicon, seeds, move_counts, games, repeat):
+    """
+    The reproducible benchmark suite: lexicon loads, move generation and scoring
+    on a seeded corpus of mid- and late-game boards, and seeded greedy self-play.
+
+    Every case records its time, its peak traced memory and a check value
+    derived from its output (move counts, score totals), so that a comparison
+    between runs can tell a speed change from a behaviour change. Memory-mapped
+    lexicons are paged in by the OS rather than allocated, so tracemalloc does
+    not see them.
+
+    Returns:
+        dict: Case name -> {'seconds', 'peak_mb', 'per_unit_ms', 'units', 'check'}
+    """
+    from game import GreedyAIPlayer
+    from simulate import play_game
+
+    results = {}
+
+    def record(name, run, units, case_repeat=repeat):
+        seconds, peak, check = _timed_run(run, case_repeat)
+        results[name] = {'seconds': seconds, 'peak_mb': peak / 2**20,
+                         'per_unit_ms': seconds / units * 1000, 'units': units, 'check': check}
+        print(f"{name:<40}{seconds:>10.3f} s{seconds / units * 1000:>12.3f} ms/unit"
+              f"{peak / 2**20:>10.2f} MB  check {check}")
+
+    for lexicon_file in lexicon_files:
+        # A load is a single run per round; word lists take seconds, compiled files milliseconds.
+        record(f"load {lexicon_file}", lambda: build_tree_from_file(lexicon_file).is_word('quiz'), 1,
+               1 if lexicon_file.endswith('.txt') else repeat)
+
+    lexicon = build_tree_from_file(solve_lexicon)
+    for num_moves in move_counts:
+        positions = [random_board(lexicon, seed, num_moves) for seed in seeds]
+        # Warm the cross-check caches, which later solves on the same board reuse.
+        solved = []
+        for board, rack in positions:
+            solver = make_solver(lexicon, board, rack.copy())
+            solver.find_all_options()
+            solved.append((board, solver.found_moves))
+
+        def solve_all():
+            move_count = 0
+            for board, rack in positions:
+                solver = make_solver(lexicon, board, rack.copy())
+                solver.find_all_options()
+                move_count += len(solver.found_moves)
+            return move_count
+
+        record(f"find_all_options {num_moves} moves", solve_all, len(positions))
+
+        def score_all():
+            total = 0
+            for board, moves in solved:
+                for word, pos, direction, used_rack, _ in moves:
+                    total += board.calculate_score(word, pos, direction, used_rack)
+            return total
+        record(f"calculate_score {num_moves} moves", score_all, sum(len(moves) for _, moves in solved))
+
+    def play_games():
+        scores = [play_game([GreedyAIPlayer, GreedyAIPlayer], lexicon, seed, seed) for seed in range(games)]
+        return sum(player['score'] for result in scores for player in result['players'])
+    record(f"greedy self-play x{games}", play_games, games, 1)
+    return results
+
+
+def save_suite(results, output, baseline=None):
+    """Write suite results with the environment they ran in, and compare them to an earlier results file."""
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Saved to {output}")
+    if baseline is None:
+        return
+    with open(baseline) as file:
+        previous = json.load(file)['results']
+    print(f"Compared with {baseline}:")
+    for name, result in results.items():
+        if name not in previous:
+            continue
+        old = previous[name]
+        change = result['seconds'] / old['seconds'] - 1
+        note = "" if result['check'] == old['check'] else f"  output changed: {old['check']} -> {result['check']}"
+        print(f"  {name:<40}{change:>+9.1%} time{result['peak_mb'] - old['peak_mb']:>+9.1f} MB{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrabble engine benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    lexicon_parser = subparsers.add_parser('lexicon', help="compare trie and DAWG build time and memory")
+    lexicon_parser.add_argument('file_name', nargs='?', default='lexicon/lexicon_full.txt')
+
+    load_parser = subparsers.add_parser('load', help="compare word list and compiled lexicon load time")
+    load_parser.add_argument('text_file', nargs='?', default='lexicon/lexicon_full.txt')
+    load_parser.add_argument('compiled_file', nargs='?', default='lexicon/lexicon_full.dawg')
+
+    engines_parser = subparsers.add_parser('engines', help="check and time Appel-Jacobson against GADDAG")
+    engines_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    engines_parser.add_argument('--gaddag', default='lexicon/lexicon_full.gaddag')
+    engines_parser.add_argument('--boards', type=int, default=20)
+    engines_parser.add_argument('--moves', type=int, default=8, help="moves played on each random board")
+
+    cross_check_parser = subparsers.add_parser('crosschecks', help="verify and time the incremental cross-check cache")
+    cross_check_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    cross_check_parser.add_argument('--games', type=int, default=5)
+    cross_check_parser.add_argument('--moves', type=int, default=15, help="moves played in each game")
+
+    solve_parser = subparsers.add_parser('solve', help="time move generation on seeded boards")
+    solve_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    solve_parser.add_argument('--boards', type=int, default=20)
+    solve_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+    solve_parser.add_argument('--repeat', type=int, default=5)
+
+    scores_parser = subparsers.add_parser('scores', help="verify generated move scores against calculate_score")
+    scores_parser.add_argument('lexicons', nargs='*', default=['lexicon/lexicon_full.dawg', 'lexicon/lexicon_full.gaddag'])
+    scores_parser.add_argument('--boards', type=int, default=30)
+    scores_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+
+    board_parser = subparsers.add_parser('board', help="time board copies against in-place apply/undo")
+    board_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    board_parser.add_argument('--boards', type=int, default=20)
+    board_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+
+    lookahead_parser = subparsers.add_parser('lookahead', help="time copy-based against apply/undo lookahead")
+    lookahead_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    lookahead_parser.add_argument('--boards', type=int, default=5)
+    lookahead_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+
+    parallel_parser = subparsers.add_parser('parallel', help="time adversarial lookahead across worker processes")
+    parallel_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    parallel_parser.add_argument('--boards', type=int, default=5)
+    parallel_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+    parallel_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+
+    pool_parser = subparsers.add_parser('pool', help="check and time SolverPool against the serial solver")
+    pool_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    pool_parser.add_argument('--boards', type=int, default=20)
+    pool_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+    pool_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+
+    leaves_parser = subparsers.add_parser('leaves', help="time leave-value equity scoring of generated moves")
+    leaves_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    leaves_parser.add_argument('--table', default='lexicon/leaves.bin')
+    leaves_parser.add_argument('--boards', type=int, default=20)
+    leaves_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+
+    anagrams_parser = subparsers.add_parser('anagrams', help="verify and time alphagram rack queries and openings")
+    anagrams_parser.add_argument('lexicons', nargs='*', default=['lexicon/lexicon_full.dawg', 'lexicon/lexicon_full.gaddag'])
+    anagrams_parser.add_argument('--racks', type=int, default=50)
+
+    blanks_parser = subparsers.add_parser('blanks', help="verify blank generation and time racks with blanks")
+    blanks_parser.add_argument('lexicons', nargs='*', default=['lexicon/lexicon_full.dawg', 'lexicon/lexicon_full.gaddag'])
+    blanks_parser.add_argument('--boards', type=int, default=10)
+    blanks_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+
+    streaming_parser = subparsers.add_parser('streaming', help="verify and time best_move / top_moves")
+    streaming_parser.add_argument('lexicons', nargs='*', default=['lexicon/lexicon_full.dawg', 'lexicon/lexicon_full.gaddag'])
+    streaming_parser.add_argument('--boards', type=int, default=20)
+    streaming_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+    streaming_parser.add_argument('--top', type=int, default=10)
+
+    transpositions_parser = subparsers.add_parser('transpositions', help="verify and time the transposition cache")
+    transpositions_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    transpositions_parser.add_argument('--boards', type=int, default=5)
+    transpositions_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+
+    prepared_parser = subparsers.add_parser('prepared', help="verify and time PreparedBoard across many racks")
+    prepared_parser.add_argument('lexicons', nargs='*', default=['lexicon/lexicon_full.dawg', 'lexicon/lexicon_full.gaddag'])
+    prepared_parser.add_argument('--boards', type=int, default=10)
+    prepared_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+    prepared_parser.add_argument('--racks', type=int, default=20, help="racks solved on each board")
+
+    expectimax_parser = subparsers.add_parser('expectimax', help="verify and time expectimax pruning")
+    expectimax_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    expectimax_parser.add_argument('--boards', type=int, default=5)
+    expectimax_parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+    expectimax_parser.add_argument('--depths', type=int, nargs='+', default=[2, 3])
+
+    endgame_parser = subparsers.add_parser('endgame', help="solve seeded endgames and check them exhaustively")
+    endgame_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    endgame_parser.add_argument('--boards', type=int, default=10)
+    endgame_parser.add_argument('--tiles', type=int, default=8, help="tiles left on the two racks together")
+    endgame_parser.add_argument('--time-limit', type=float, default=5.0)
+    endgame_parser.add_argument('--check', action='store_true', help="compare with exhaustive minimax (small endgames)")
+
+    suite_parser = subparsers.add_parser('suite', help="run the reproducible benchmark suite and save its results")
+    suite_parser.add_argument('--lexicons', nargs='+', default=['lexicon/lexicon_full.txt', 'lexicon/lexicon_full.dawg',
+                                                                'lexicon/lexicon_full.gaddag'])
+    suite_parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg', help="lexicon for solving and games")
+    suite_parser.add_argument('--boards', type=int, default=20)
+    suite_parser.add_argument('--moves', type=int, nargs='+', default=[8, 16],
+                              help="moves played on each random board: one corpus per count (mid and late game)")
+    suite_parser.add_argument('--games', type=int, default=3)
+    suite_parser.add_argument('--repeat', type=int, default=3)
+    suite_parser.add_argument('--output', default='benchmark_results.json')
+    suite_parser.add_argument('--compare', metavar='RESULTS', help="earlier results file to compare against")
+
+    args = parser.parse_args()
+    if args.command == 'lexicon':
+        compare_lexicon_builds(args.file_name)
+    elif args.command == 'load':
+        compare_lexicon_loads(args.text_file, args.compiled_file)
+    elif args.command == 'engines':
+        compare_engines(args.lexicon, args.gaddag, list(range(args.boards)), args.moves)
+    elif args.command == 'crosschecks':
+        compare_cross_check_cache(args.lexicon, list(range(args.games)), args.moves)
+    elif args.command == 'scores':
+        check_move_scores(args.lexicons, list(range(args.boards)), args.moves)
+    elif args.command == 'board':
+        benchmark_board_states(args.lexicon, list(range(args.boards)), args.moves)
+    elif args.command == 'lookahead':
+        compare_lookahead(args.lexicon, list(range(args.boards)), args.moves)
+    elif args.command == 'parallel':
+        compare_parallel_lookahead(args.lexicon, list(range(args.boards)), args.moves, args.workers)
+    elif args.command == 'pool':
+        compare_solver_pool(args.lexicon, list(range(args.boards)), args.moves, args.workers)
+    elif args.command == 'leaves':
+        benchmark_leave_lookups(args.lexicon, args.table, list(range(args.boards)), args.moves)
+    elif args.command == 'anagrams':
+        benchmark_anagrams(args.lexicons, args.racks)
+    elif args.command == 'blanks':
+        compare_blank_racks(args.lexicons, list(range(args.boards)), args.moves)
+    elif args.command == 'streaming':
+        compare_streaming(args.lexicons, list(range(args.boards)), args.moves, args.top)
+    elif args.command == 'solve':
+        benchmark_solver(args.lexicon, list(range(args.boards)), args.moves, args.repeat)
+    elif args.command == 'transpositions':
+        compare_transposition_cache(args.lexicon, list(range(args.boards)), args.moves)
+    elif args.command == 'prepared':
+        compare_prepared_boards(args.lexicons, list(range(args.boards)), args.moves, args.racks)
+    elif args.command == 'expectimax':
+        compare_expectimax_pruning(args.lexicon, list(range(args.boards)), args.moves, args.depths)
+    elif args.command == 'endgame':
+        compare_endgames(args.lexicon, list(range(args.boards)), args.tiles, args.time_limit, args.check)
+    elif args.command == 'suite':
+        results = run_suite(args.lexicons, args.lexicon, list(range(args.boards)), args.moves, args.games, args.repeat)
+        save_suite(results, args.output, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
+import random
 from enum import Enum
-from PIL import Image, ImageDraw, ImageFont
 
 class Modifier(Enum):
     NORMAL = ("Normal", "white")
@@ -8,17 +8,67 @@ class Modifier(Enum):
     DOUBLE_WORD = ("2WS", "pink")
     TRIPLE_WORD = ("3WS", "red")
 
-class Square:
+# Multipliers applied to a tile newly placed on a square with the given modifier.
+LETTER_MULTIPLIERS = {Modifier.DOUBLE_LETTER: 2, Modifier.TRIPLE_LETTER: 3}
+WORD_MULTIPLIERS = {Modifier.DOUBLE_WORD: 2, Modifier.TRIPLE_WORD: 3}
 
-    def __init__(self, letter=None, modifier=Modifier.NORMAL):
-        self.letter = letter
-        self.modifier = modifier
+# A blank tile is '?' on a rack; on the board (and in move words) it is the letter it
+# stands for in upper case.
+BLANK = '?'
+
+# Tile bytes hold ord(letter), with 0 for an empty square.
+_TILE_LETTERS = [None] + [chr(value) for value in range(1, 256)]
+
+
+def _build_layout(size):
+    modifiers = [[Modifier.NORMAL] * size for _ in range(size)]
+
+    def set_modifier(squares, modifier):
+        for i, j in squares:
+            if i < size and j < size:
+                modifiers[i][j] = modifier
+
+    # Set up triple word squares
+    set_modifier([(0, 0), (0, 7), (0, 14), (7, 0), (7, 14), (14, 0), (14, 7), (14, 14)], Modifier.TRIPLE_WORD)
+
+    # Set up double word squares
+    set_modifier([(1, 1), (2, 2), (3, 3), (4, 4), (1, 13), (2, 12), (3, 11), (4, 10),
+                  (13, 1), (12, 2), (11, 3), (10, 4), (13, 13), (12, 12), (11, 11), (10, 10)], Modifier.DOUBLE_WORD)
+
+    # Set up triple letter squares
+    set_modifier([(1, 5), (1, 9), (5, 1), (5, 5), (5, 9), (5, 13), (9, 1), (9, 5), (9, 9), (9, 13), (13, 5),
+                  (13, 9)], Modifier.TRIPLE_LETTER)
+
+    # Set up double letter squares
+    set_modifier([(0, 3), (0, 11), (2, 6), (2, 8), (3, 0), (3, 7), (3, 14),
+                  (6, 2), (6, 6), (6, 8), (6, 12), (7, 3), (7, 11),
+                  (8, 2), (8, 6), (8, 8), (8, 12), (11, 0), (11, 7), (11, 14),
+                  (12, 6), (12, 8), (14, 3), (14, 11)], Modifier.DOUBLE_LETTER)
+
+    modifiers = tuple(tuple(row) for row in modifiers)
+    # Per-square multiplier tables so scoring code doesn't compare Modifier members per letter
+    letter_multipliers = tuple(tuple(LETTER_MULTIPLIERS.get(modifier, 1) for modifier in row) for row in modifiers)
+    word_multipliers = tuple(tuple(WORD_MULTIPLIERS.get(modifier, 1) for modifier in row) for row in modifiers)
+    return modifiers, letter_multipliers, word_multipliers
+
+
+# Premium-square layouts are immutable and shared by every Board of the same size.
+_LAYOUTS = dict()
+
+# Zobrist keys per board size: one random 64-bit key per (square, tile byte), indexed
+# square * 128 + byte (tiles are ASCII letters), with 0 for an empty square. The keys
+# come from a fixed seed, so hashes agree between processes and boards can be pickled.
+_ZOBRIST_KEYS = dict()
+
+
+def _build_zobrist_keys(size):
+    rng = random.Random(size)
+    keys = []
+    for _ in range(size * size):
+        keys.append(0)
+        keys.extend(rng.getrandbits(64) for _ in range(127))
+    return keys
 
-    def __str__(self):
-        if not self.letter:
-            return "_"
-        else:
-            return self.letter
 
 class Board:
 
@@ -27,36 +77,67 @@ class Board:
         'j': 8, 'k': 5, 'l': 1, 'm': 3, 'n': 1, 'o': 1, 'p': 3, 'q': 10, 'r': 1,
         's': 1, 't': 1, 'u': 1, 'v': 4, 'w': 4, 'x': 8, 'y': 4, 'z': 10
     }
+    # Blanks score nothing, whatever letter they stand for.
+    LETTER_SCORES.update({letter.upper(): 0 for letter in LETTER_SCORES})
+    LETTER_SCORES[BLANK] = 0
+
+    BINGO_BONUS = 50
 
     def __init__(self, size):
         self.size = size
-        self._tiles = [[Square() for _ in range(self.size)] for _ in range(self.size)]
+        # Row-major tiles, one byte per square
+        self._tiles = bytearray(size * size)
+        # XOR of the Zobrist keys of every tile, kept up to date by set_tile (see zobrist_hash)
+        self._hash = 0
         self._setup_board()
+        # Optional cross_check.CrossCheckCache, told about every tile change.
+        self.cross_check_cache = None
 
     def _setup_board(self):
-        # Set up triple word squares
-        for i, j in [(0, 0), (0, 7), (0, 14), (7, 0), (7, 14), (14, 0), (14, 7), (14, 14)]:
-            self._tiles[i][j].modifier = Modifier.TRIPLE_WORD
-
-        # Set up double word squares
-        for i, j in [(1, 1), (2, 2), (3, 3), (4, 4), (1, 13), (2, 12), (3, 11), (4, 10),
-                     (13, 1), (12, 2), (11, 3), (10, 4), (13, 13), (12, 12), (11, 11), (10, 10)]:
-            self._tiles[i][j].modifier = Modifier.DOUBLE_WORD
-
-        # Set up triple letter squares
-        for i, j in [(1, 5), (1, 9), (5, 1), (5, 5), (5, 9), (5, 13), (9, 1), (9, 5), (9, 9), (9, 13), (13, 5),
-                     (13, 9)]:
-            self._tiles[i][j].modifier = Modifier.TRIPLE_LETTER
-
-        # Set up double letter squares
-        for i, j in [(0, 3), (0, 11), (2, 6), (2, 8), (3, 0), (3, 7), (3, 14),
-                     (6, 2), (6, 6), (6, 8), (6, 12), (7, 3), (7, 11),
-                     (8, 2), (8, 6), (8, 8), (8, 12), (11, 0), (11, 7), (11, 14),
-                     (12, 6), (12, 8), (14, 3), (14, 11)]:
-            self._tiles[i][j].modifier = Modifier.DOUBLE_LETTER
+        if self.size not in _LAYOUTS:
+            _LAYOUTS[self.size] = _build_layout(self.size)
+        self.modifiers, self.letter_multipliers, self.word_multipliers = _LAYOUTS[self.size]
+        if self.size not in _ZOBRIST_KEYS:
+            _ZOBRIST_KEYS[self.size] = _build_zobrist_keys(self.size)
+        self._zobrist_keys = _ZOBRIST_KEYS[self.size]
 
     def __str__(self):
-        return '\n'.join(''.join(str(tile) for tile in row) for row in self._tiles)
+        return '\n'.join(''.join(_TILE_LETTERS[tile] or '_' for tile in self._tiles[row * self.size:(row + 1) * self.size])
+                         for row in range(self.size))
+
+    @classmethod
+    def from_string(cls, text):
+        """Board from the text str(board) produces: one line per row, '_' for an empty square."""
+        rows = [line.strip() for line in text.strip().splitlines()]
+        board = cls(len(rows))
+        for row, line in enumerate(rows):
+            if len(line) != board.size:
+                raise ValueError(f"Row {row} has {len(line)} squares, expected {board.size}")
+            for col, tile in enumerate(line):
+                if tile != '_':
+                    board.set_tile((row, col), tile)
+        return board
+
+    def tile_bytes(self):
+        """The squares in row-major order, one byte each: ord(letter), or 0 if empty."""
+        return bytes(self._tiles)
+
+    @classmethod
+    def from_tile_bytes(cls, data, size=15):
+        """Board whose squares are `data` as returned by tile_bytes (no per-square validation)."""
+        if len(data) != size * size:
+            raise ValueError(f"Expected {size * size} tile bytes, got {len(data)}")
+        board = cls.__new__(cls)
+        board.size = size
+        board._tiles = bytearray(data)
+        board._setup_board()
+        keys = board._zobrist_keys
+        board._hash = 0
+        for index, tile in enumerate(board._tiles):
+            if tile:
+                board._hash ^= keys[index * 128 + tile]
+        board.cross_check_cache = None
+        return board
 
     def all_positions(self):
         result = []
@@ -67,11 +148,57 @@ class Board:
 
     def get_tile(self, pos):
         row, col = pos
-        return self._tiles[row][col].letter
+        return _TILE_LETTERS[self._tiles[row * self.size + col]]
+
+    @property
+    def zobrist_hash(self):
+        """64-bit hash of the tiles on the board, updated incrementally as tiles are set."""
+        return self._hash
 
     def set_tile(self, pos, tile):
         row, col = pos
-        self._tiles[row][col].letter = tile
+        index = row * self.size + col
+        value = ord(tile) if tile else 0
+        keys = self._zobrist_keys
+        self._hash ^= keys[index * 128 + self._tiles[index]] ^ keys[index * 128 + value]
+        self._tiles[index] = value
+        if self.cross_check_cache is not None:
+            self.cross_check_cache.mark_dirty(pos)
+
+    def apply_move(self, word, pos, direction):
+        """
+        Put a word's tiles on the board in place, without rack bookkeeping or scoring.
+        Any attached cross-check cache is checkpointed, so undo_move restores it
+        exactly instead of recomputing it.
+
+        Args:
+            word (str): The word to be placed
+            pos (tuple): Starting position (row, col)
+            direction (str): 'across' or 'down'
+
+        Returns:
+            list: Positions of the newly placed tiles, to pass to undo_move
+        """
+        if self.cross_check_cache is not None:
+            self.cross_check_cache.push_state()
+        row, col = pos
+        placed = []
+        for letter in word:
+            if self.get_tile((row, col)) is None:
+                self.set_tile((row, col), letter)
+                placed.append((row, col))
+            if direction == 'across':
+                col += 1
+            else:
+                row += 1
+        return placed
+
+    def undo_move(self, placed):
+        """Remove the tiles placed by apply_move and restore the cross-check cache."""
+        for pos in placed:
+            self.set_tile(pos, None)
+        if self.cross_check_cache is not None:
+            self.cross_check_cache.pop_state()
 
     def place_word(self, word, pos, direction, rack):
         """
@@ -98,7 +225,7 @@ class Board:
             # If the letter isn't already on the board, it must be in the rack
             if self.get_tile((row_cp2, col_cp2)) is None:
                 try:
-                    rack_used_cp2.remove(letter.lower())
+                    rack_used_cp2.remove(BLANK if letter.isupper() else letter)
                 except ValueError:
                     # If letter not in rack, word can't be placed
                     return 0, rack
@@ -121,7 +248,7 @@ class Board:
             # If the letter isn't already on the board, it must be in the rack
             if self.get_tile((row_cp1, col_cp1)) is None:
                 try:
-                    rack_used_cp1.remove(letter.lower())
+                    rack_used_cp1.remove(BLANK if letter.isupper() else letter)
                 except ValueError:
                     # If letter not in rack, word can't be placed
                     return 0, rack
@@ -146,17 +273,39 @@ class Board:
         return 0 <= row < self.size and 0 <= col < self.size
 
     def is_empty(self, pos):
-        return self.in_bounds(pos) and self.get_tile(pos) is None
+        row, col = pos
+        return 0 <= row < self.size and 0 <= col < self.size and not self._tiles[row * self.size + col]
 
     def is_filled(self, pos):
-        return self.in_bounds(pos) and self.get_tile(pos) is not None
+        row, col = pos
+        return 0 <= row < self.size and 0 <= col < self.size and self._tiles[row * self.size + col] != 0
 
     def copy(self):
-        result = Board(self.size)
-        for pos in self.all_positions():
-            result.set_tile(pos, self.get_tile(pos))
+        result = Board.__new__(Board)
+        result.size = self.size
+        result._tiles = self._tiles.copy()
+        result._hash = self._hash
+        result._zobrist_keys = self._zobrist_keys
+        result.modifiers = self.modifiers
+        result.letter_multipliers = self.letter_multipliers
+        result.word_multipliers = self.word_multipliers
+        result.cross_check_cache = None
+        if self.cross_check_cache is not None:
+            result.cross_check_cache = self.cross_check_cache.copy(result)
         return result
 
+    def __getstate__(self):
+        # The cross-check cache holds the lexicon; it is rebuilt on demand wherever the board is unpickled.
+        state = self.__dict__.copy()
+        state['cross_check_cache'] = None
+        # Shared per board size; _setup_board finds them again when unpickling.
+        del state['_zobrist_keys']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup_board()
+
     def calculate_score(self, word, pos, direction, rack_used):
         """
         Calculate the score for a move, including cross-words formed.
@@ -180,21 +329,14 @@ class Board:
         for letter in word:
             curr_pos = (row, col)
             letter_multiplier = 1
-            square = self._tiles[row][col]
 
             # Only apply multipliers if the tile is being placed (not already on board)
-            if square.letter is None:
+            if self.get_tile(curr_pos) is None:
                 tiles_used += 1
-                if square.modifier == Modifier.DOUBLE_LETTER:
-                    letter_multiplier = 2
-                elif square.modifier == Modifier.TRIPLE_LETTER:
-                    letter_multiplier = 3
-                elif square.modifier == Modifier.DOUBLE_WORD:
-                    word_multiplier *= 2
-                elif square.modifier == Modifier.TRIPLE_WORD:
-                    word_multiplier *= 3
+                letter_multiplier = self.letter_multipliers[row][col]
+                word_multiplier *= self.word_multipliers[row][col]
 
-            main_word_score += self.LETTER_SCORES[letter.lower()] * letter_multiplier
+            main_word_score += self.LETTER_SCORES[letter] * letter_multiplier
 
             # Move to next position
             if direction == 'across':
@@ -209,7 +351,7 @@ class Board:
         row, col = pos
         for i, letter in enumerate(word):
             curr_pos = (row, col)
-            if self._tiles[row][col].letter is None:  # Only check for cross-words at new tile positions
+            if self.get_tile(curr_pos) is None:  # Only check for cross-words at new tile positions
                 cross_word = self._get_cross_word(curr_pos, direction)
                 if cross_word is not None:
                     cross_score = self._score_cross_word(cross_word, curr_pos, direction, letter)
@@ -222,7 +364,7 @@ class Board:
 
         # Add bingo bonus (50 points) if all 7 tiles are used
         if len(rack_used) == 7:
-            total_score += 50
+            total_score += self.BINGO_BONUS
 
         return total_score
 
@@ -235,12 +377,12 @@ class Board:
         start_row, start_col = row, col
         while True:
             if cross_direction == 'down':
-                if start_row > 0 and self._tiles[start_row - 1][col].letter is not None:
+                if start_row > 0 and self.get_tile((start_row - 1, col)) is not None:
                     start_row -= 1
                 else:
                     break
             else:
-                if start_col > 0 and self._tiles[row][start_col - 1].letter is not None:
+                if start_col > 0 and self.get_tile((row, start_col - 1)) is not None:
                     start_col -= 1
                 else:
                     break
@@ -250,19 +392,19 @@ class Board:
         curr_row, curr_col = start_row, start_col
         while curr_row < self.size and curr_col < self.size:
             if cross_direction == 'down':
-                if curr_row == row and self._tiles[curr_row][col].letter is None:
+                if curr_row == row and self.get_tile((curr_row, col)) is None:
                     # This is where the new tile will go
                     cross_word += "?"
-                elif self._tiles[curr_row][col].letter is not None:
-                    cross_word += self._tiles[curr_row][col].letter
+                elif self.get_tile((curr_row, col)) is not None:
+                    cross_word += self.get_tile((curr_row, col))
                 else:
                     break
                 curr_row += 1
             else:
-                if curr_col == col and self._tiles[row][curr_col].letter is None:
+                if curr_col == col and self.get_tile((row, curr_col)) is None:
                     cross_word += "?"
-                elif self._tiles[row][curr_col].letter is not None:
-                    cross_word += self._tiles[row][curr_col].letter
+                elif self.get_tile((row, curr_col)) is not None:
+                    cross_word += self.get_tile((row, curr_col))
                 else:
                     break
                 curr_col += 1
@@ -281,12 +423,12 @@ class Board:
         cross_direction = 'down' if main_direction == 'across' else 'across'
         while True:
             if cross_direction == 'down':
-                if start_row > 0 and self._tiles[start_row - 1][col].letter is not None:
+                if start_row > 0 and self.get_tile((start_row - 1, col)) is not None:
                     start_row -= 1
                 else:
                     break
             else:
-                if start_col > 0 and self._tiles[row][start_col - 1].letter is not None:
+                if start_col > 0 and self.get_tile((row, start_col - 1)) is not None:
                     start_col -= 1
                 else:
                     break
@@ -299,18 +441,11 @@ class Board:
 
             # If this is the intersection point
             if curr_row == row and curr_col == col:
-                square = self._tiles[curr_row][curr_col]
-                if square.modifier == Modifier.DOUBLE_LETTER:
-                    letter_multiplier = 2
-                elif square.modifier == Modifier.TRIPLE_LETTER:
-                    letter_multiplier = 3
-                elif square.modifier == Modifier.DOUBLE_WORD:
-                    word_multiplier *= 2
-                elif square.modifier == Modifier.TRIPLE_WORD:
-                    word_multiplier *= 3
-                word_score += self.LETTER_SCORES[new_letter.lower()] * letter_multiplier
+                letter_multiplier = self.letter_multipliers[curr_row][curr_col]
+                word_multiplier *= self.word_multipliers[curr_row][curr_col]
+                word_score += self.LETTER_SCORES[new_letter] * letter_multiplier
             else:
-                word_score += self.LETTER_SCORES[letter.lower()]
+                word_score += self.LETTER_SCORES[letter]
 
             if cross_direction == 'down':
                 curr_row += 1
@@ -320,6 +455,9 @@ class Board:
         return word_score * word_multiplier
 
     def visualize(self, filename='scrabble_board.png'):
+        # Pillow is only needed for rendering, so importing board does not pay for it
+        from PIL import Image, ImageDraw, ImageFont
+
         cell_size = 40
         img_size = (self.size + 1) * cell_size
         img = Image.new('RGB', (img_size, img_size), color='beige')
@@ -329,20 +467,21 @@ class Board:
         for i in range(self.size):
             for j in range(self.size):
                 x, y = (j + 1) * cell_size, (i + 1) * cell_size
-                square = self._tiles[i][j]
+                modifier = self.modifiers[i][j]
+                letter = self.get_tile((i, j))
 
                 # Draw modifier circle
-                if square.modifier != Modifier.NORMAL:
+                if modifier != Modifier.NORMAL:
                     draw.ellipse([x + 5, y + 5, x + cell_size - 5, y + cell_size - 5],
-                                 fill=square.modifier.value[1])
+                                 fill=modifier.value[1])
 
                 # Draw cell border
                 draw.rectangle([x, y, x + cell_size, y + cell_size], outline='black')
 
-                # Draw letter
-                if square.letter:
+                # Draw letter (blanks in gray)
+                if letter:
                     draw.text((x + cell_size // 4, y + cell_size // 4),
-                              square.letter.upper(), fill='black', font=font)
+                              letter.upper(), fill='gray' if letter.isupper() else 'black', font=font)
 
         # Draw row numbers
         for i in range(self.size):
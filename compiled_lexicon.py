@@ -0,0 +1,171 @@
+"""
+Compiled, memory-mapped lexicon format.
+
+A compiled lexicon is a DAWG flattened into a single array of 32-bit edges. The
+edges leaving a node are stored contiguously; each edge packs
+
+    bits 0-4   letter index into ALPHABET
+    bit  5     last edge of its node's edge list
+    bit  6     the child node is the end of a word
+    bits 7-31  index of the child's first edge (0 if the child has no edges)
+
+Edge 0 is a reserved sentinel so that 0 can mean "no children". The file is
+opened with mmap, so loading is near-instant and every process that opens the
+same file shares its physical pages.
+
+Usage:
+    python compiled_lexicon.py lexicon/lexicon_full.txt lexicon/lexicon_full.dawg
+
+GADDAGs use the same format; see gaddag.py.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from dawg import build_dawg_from_file
+
+# '>' is the GADDAG separator (see gaddag.py).
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz>'
+
+MAGIC = b'DAWG'
+VERSION = 1
+# magic, version, edge count, root first edge, root is_word
+HEADER = struct.Struct('<4sIIII')
+
+LETTER_MASK = 0x1F
+LAST_EDGE = 1 << 5
+TERMINAL = 1 << 6
+CHILD_SHIFT = 7
+
+
+def compile_lexicon(dawg, file_name):
+    """
+    Write a DAWG (or any structure with root / children / is_word) to a compiled lexicon file.
+
+    Args:
+        dawg: Lexicon to compile
+        file_name (str): Output path, conventionally ending in .dawg
+
+    Returns:
+        int: Number of edges written
+    """
+    # Assign every node with children a contiguous edge range, then fill the ranges.
+    first_edge = dict()
+    order = []
+    next_edge = 1
+    stack = [dawg.root]
+    while stack:
+        node = stack.pop()
+        if id(node) in first_edge or not node.children:
+            continue
+        first_edge[id(node)] = next_edge
+        order.append(node)
+        next_edge += len(node.children)
+        stack.extend(node.children.values())
+
+    edges = array('I', [0]) * next_edge
+    for node in order:
+        index = first_edge[id(node)]
+        letters = sorted(node.children)
+        for i, letter in enumerate(letters):
+            child = node.children[letter]
+            value = ALPHABET.index(letter) | (first_edge.get(id(child), 0) << CHILD_SHIFT)
+            if child.is_word:
+                value |= TERMINAL
+            if i == len(letters) - 1:
+                value |= LAST_EDGE
+            edges[index + i] = value
+
+    if sys.byteorder != 'little':
+        edges.byteswap()
+    with open(file_name, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(edges), first_edge.get(id(dawg.root), 0), int(dawg.root.is_word)))
+        edges.tofile(file)
+    return len(edges)
+
+
+class CompiledNode:
+    """Node view over a compiled lexicon. `children` is decoded from the edge array on first access."""
+
+    __slots__ = ('is_word', 'children', '_lexicon', '_first_edge')
+
+    def __init__(self, lexicon, first_edge, is_word):
+        self._lexicon = lexicon
+        self._first_edge = first_edge
+        self.is_word = is_word
+
+    def __getattr__(self, name):
+        # Only reached while the `children` slot is still unset.
+        if name != 'children':
+            raise AttributeError(name)
+        children = self._lexicon._decode_children(self._first_edge)
+        self.children = children
+        return children
+
+
+class CompiledLexicon:
+    """Read-only lexicon backed by a memory-mapped compiled file, usable wherever a LetterTree is."""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self._file = open(file_name, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, edge_count, root_edge, root_is_word = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file_name} is not a version {VERSION} compiled lexicon")
+        if sys.byteorder != 'little':
+            raise ValueError("Compiled lexicons can only be memory-mapped on little-endian machines")
+        self._edges = memoryview(self._mmap)[HEADER.size:HEADER.size + 4 * edge_count].cast('I')
+        self.edge_count = edge_count
+        # Node views are shared so that each edge list is decoded at most once per process.
+        self._nodes = dict()
+        self.root = self._node(root_edge, bool(root_is_word))
+
+    def _node(self, first_edge, is_word):
+        key = first_edge * 2 + is_word
+        node = self._nodes.get(key)
+        if node is None:
+            node = CompiledNode(self, first_edge, is_word)
+            if first_edge == 0:
+                node.children = dict()
+            self._nodes[key] = node
+        return node
+
+    def _decode_children(self, first_edge):
+        children = dict()
+        edges = self._edges
+        index = first_edge
+        while True:
+            value = edges[index]
+            children[ALPHABET[value & LETTER_MASK]] = self._node(value >> CHILD_SHIFT, bool(value & TERMINAL))
+            if value & LAST_EDGE:
+                return children
+            index += 1
+
+    def lookup(self, word):
+        current_node = self.root
+        for letter in word:
+            current_node = current_node.children.get(letter)
+            if current_node is None:
+                return None
+        return current_node
+
+    def is_word(self, word):
+        word_node = self.lookup(word)
+        if word_node is None:
+            return False
+        return word_node.is_word
+
+    def __reduce__(self):
+        # Reopen the mapping rather than pickling decoded nodes when sent to another process.
+        return (CompiledLexicon, (self.file_name,))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python compiled_lexicon.py <words.txt> <output.dawg>")
+        sys.exit(1)
+    source, target = sys.argv[1], sys.argv[2]
+    edge_count = compile_lexicon(build_dawg_from_file(source), target)
+    print(f"Compiled {source} to {target} ({edge_count} edges)")
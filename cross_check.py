@@ -0,0 +1,227 @@
+from board import Board
+
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+# Cross-check sets are 26-bit masks: bit i is set when ALPHABET[i] may be played.
+LETTER_INDEX = {letter: index for index, letter in enumerate(ALPHABET)}
+LETTER_BITS = {letter: 1 << index for index, letter in enumerate(ALPHABET)}
+BIT_LETTERS = {bit: letter for letter, bit in LETTER_BITS.items()}
+ALL_LETTERS = (1 << len(ALPHABET)) - 1
+
+# Offset of the cross-word axis for each move direction: words played across are
+# constrained by the vertical words they form, and vice versa.
+CROSS_STEP = {'across': (1, 0), 'down': (0, 1)}
+
+
+def cross_check_mask(root, letters_before, letters_after):
+    """
+    Mask of the letters X for which letters_before + X + letters_after is a word.
+
+    The prefix is walked once, only the existing children of the prefix node are
+    tried, and each is followed through the suffix, so no candidate strings are
+    built and no prefix is re-walked per letter.
+
+    Args:
+        root: Root node of a prefix lexicon (anything with `children` / `is_word`)
+        letters_before: Letters on the board before the square, in reading order
+        letters_after: Letters on the board after the square, in reading order
+
+    Returns:
+        int: Cross-check mask
+    """
+    node = root
+    for letter in letters_before:
+        node = node.children.get(letter)
+        if node is None:
+            return 0
+    mask = 0
+    for letter, child in node.children.items():
+        bit = LETTER_BITS.get(letter)
+        if bit is None:
+            continue
+        for after_letter in letters_after:
+            child = child.children.get(after_letter)
+            if child is None:
+                break
+        else:
+            if child.is_word:
+                mask |= bit
+    return mask
+
+
+class CrossCheckCache:
+    """
+    Cross-check sets, cross-word base scores and anchors for a board, kept up to
+    date incrementally.
+
+    The cache is attached to a Board (see `for_board`). `Board.set_tile` reports
+    every changed square, and only the squares whose cross-words can have
+    changed (the ends of the affected row and column runs, plus the square
+    itself and its neighbors for anchors) are recomputed on the next query.
+
+    `push_state` / `pop_state` bracket a temporary change to the board (see
+    Board.apply_move / undo_move): entries recomputed in between are journaled
+    and put back exactly on pop, so search code can try moves on one board.
+    """
+
+    def __init__(self, dictionary, board):
+        self.dictionary = dictionary
+        self.board = board
+        # Lexicons that are not prefix trees (e.g. gaddag.Gaddag) supply their own cross-check routine.
+        self._cross_check_mask = getattr(dictionary, 'cross_check_mask', None)
+        # direction -> {empty pos: legal letter mask}; squares without cross-words allow every letter.
+        self.checks = {direction: {pos: ALL_LETTERS for pos in board.all_positions()} for direction in CROSS_STEP}
+        # direction -> {empty pos: sum of the letter scores of the cross-word tiles}, only for
+        # squares that have a cross-word, so a move's cross-word score is known per placed tile.
+        self.cross_scores = {direction: dict() for direction in CROSS_STEP}
+        self.anchors = set()
+        self._dirty = {pos for pos in board.all_positions() if board.is_filled(pos)}
+        # One frame per push_state: ({(direction, pos): (old check, old cross score)}, {pos: was anchor})
+        self._journal = []
+
+    @classmethod
+    def for_board(cls, board, dictionary):
+        """Return the cache attached to `board`, attaching a new one if there is none for `dictionary`."""
+        cache = board.cross_check_cache
+        if cache is None or cache.dictionary is not dictionary:
+            cache = cls(dictionary, board)
+            board.cross_check_cache = cache
+        return cache
+
+    def copy(self, board):
+        result = CrossCheckCache.__new__(CrossCheckCache)
+        result.dictionary = self.dictionary
+        result.board = board
+        result._cross_check_mask = self._cross_check_mask
+        result.checks = {direction: checks.copy() for direction, checks in self.checks.items()}
+        result.cross_scores = {direction: scores.copy() for direction, scores in self.cross_scores.items()}
+        result.anchors = self.anchors.copy()
+        result._dirty = self._dirty.copy()
+        result._journal = []
+        return result
+
+    def mark_dirty(self, pos):
+        self._dirty.add(pos)
+
+    def push_state(self):
+        """Remember the current (refreshed) state so that pop_state can return to it."""
+        if self._dirty:
+            self._refresh()
+        self._journal.append((dict(), dict()))
+
+    def pop_state(self):
+        """
+        Undo every change since the matching push_state. The board's tiles must
+        already be back as they were at push time.
+        """
+        if not self._journal:
+            return
+        checks_changed, anchors_changed = self._journal.pop()
+        for (direction, pos), (check, cross_score) in checks_changed.items():
+            if check is None:
+                self.checks[direction].pop(pos, None)
+            else:
+                self.checks[direction][pos] = check
+            if cross_score is None:
+                self.cross_scores[direction].pop(pos, None)
+            else:
+                self.cross_scores[direction][pos] = cross_score
+        for pos, was_anchor in anchors_changed.items():
+            if was_anchor:
+                self.anchors.add(pos)
+            else:
+                self.anchors.discard(pos)
+        self._dirty.clear()
+
+    def cross_checks(self, direction):
+        """Mask of legal letters for every empty square when playing in `direction`."""
+        if self._dirty:
+            self._refresh()
+        return self.checks[direction]
+
+    def cross_word_scores(self, direction):
+        """Base score of the cross-word through each empty square that has one, when playing in `direction`."""
+        if self._dirty:
+            self._refresh()
+        return self.cross_scores[direction]
+
+    def anchor_list(self):
+        """Anchors in row-major order, as SolveState.find_anchors has always returned them."""
+        if self._dirty:
+            self._refresh()
+        return sorted(self.anchors)
+
+    def _refresh(self):
+        board = self.board
+        stale = {direction: set() for direction in CROSS_STEP}
+        anchor_candidates = set()
+        for pos in self._dirty:
+            row, col = pos
+            for direction, (d_row, d_col) in CROSS_STEP.items():
+                stale[direction].add(pos)
+                # The empty squares that end this square's cross-word run in either direction.
+                for sign in (-1, 1):
+                    scan_pos = (row + sign * d_row, col + sign * d_col)
+                    while board.is_filled(scan_pos):
+                        scan_pos = (scan_pos[0] + sign * d_row, scan_pos[1] + sign * d_col)
+                    if board.in_bounds(scan_pos):
+                        stale[direction].add(scan_pos)
+            anchor_candidates.update([pos, (row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)])
+        self._dirty.clear()
+
+        if self._journal:
+            checks_changed, anchors_changed = self._journal[-1]
+            for direction, positions in stale.items():
+                for pos in positions:
+                    if (direction, pos) not in checks_changed:
+                        checks_changed[(direction, pos)] = (self.checks[direction].get(pos),
+                                                            self.cross_scores[direction].get(pos))
+            for pos in anchor_candidates:
+                if pos not in anchors_changed:
+                    anchors_changed[pos] = pos in self.anchors
+
+        for direction, positions in stale.items():
+            for pos in positions:
+                if board.is_filled(pos):
+                    self.checks[direction].pop(pos, None)
+                    self.cross_scores[direction].pop(pos, None)
+                else:
+                    self._recompute(pos, direction)
+
+        for pos in anchor_candidates:
+            if not board.in_bounds(pos):
+                continue
+            row, col = pos
+            if board.is_empty(pos) and (board.is_filled((row - 1, col)) or board.is_filled((row + 1, col)) or
+                                        board.is_filled((row, col - 1)) or board.is_filled((row, col + 1))):
+                self.anchors.add(pos)
+            else:
+                self.anchors.discard(pos)
+
+    def _recompute(self, pos, direction):
+        board = self.board
+        d_row, d_col = CROSS_STEP[direction]
+        letters_before = []
+        scan_pos = (pos[0] - d_row, pos[1] - d_col)
+        while board.is_filled(scan_pos):
+            letters_before.append(board.get_tile(scan_pos))
+            scan_pos = (scan_pos[0] - d_row, scan_pos[1] - d_col)
+        letters_before.reverse()
+        letters_after = []
+        scan_pos = (pos[0] + d_row, pos[1] + d_col)
+        while board.is_filled(scan_pos):
+            letters_after.append(board.get_tile(scan_pos))
+            scan_pos = (scan_pos[0] + d_row, scan_pos[1] + d_col)
+        if not letters_before and not letters_after:
+            self.checks[direction][pos] = ALL_LETTERS
+            self.cross_scores[direction].pop(pos, None)
+            return
+        # Blanks on the board are upper case; the lexicon only knows lower case.
+        words_before = [letter.lower() for letter in letters_before]
+        words_after = [letter.lower() for letter in letters_after]
+        if self._cross_check_mask is not None:
+            self.checks[direction][pos] = self._cross_check_mask(words_before, words_after)
+        else:
+            self.checks[direction][pos] = cross_check_mask(self.dictionary.root, words_before, words_after)
+        self.cross_scores[direction][pos] = sum(Board.LETTER_SCORES[letter] for letter in letters_before) + \
+            sum(Board.LETTER_SCORES[letter] for letter in letters_after)
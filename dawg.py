@@ -0,0 +1,108 @@
+class Node:
+    """A DAWG node. Exposes the same `children` / `is_word` surface as LetterTreeNode."""
+
+    __slots__ = ('is_word', 'children', 'id')
+
+    def __init__(self, node_id, is_word=False):
+        self.id = node_id
+        self.is_word = is_word
+        self.children = dict()
+
+    def signature(self):
+        """Key identifying the right language of this node, valid once all children are minimized."""
+        return (self.is_word,) + tuple((letter, child.id) for letter, child in self.children.items())
+
+    def __getstate__(self):
+        return {'is_word': self.is_word, 'id': self.id, 'children': self.children}
+
+    def __setstate__(self, state):
+        # The pickles in lexicon/ were written by an older Node that used `is_terminal`
+        # and upper-case edge labels.
+        if isinstance(state, tuple):
+            state = state[1]
+        self.id = state.get('id')
+        self.is_word = state.get('is_word', state.get('is_terminal', False))
+        self.children = {letter.lower(): child for letter, child in state['children'].items()}
+
+
+class Dawg:
+    """
+    Minimized directed acyclic word graph, built incrementally from sorted words
+    (Daciuk et al. 2000). Common prefixes and common suffixes are stored once, so
+    the graph is a drop-in replacement for LetterTree with a fraction of the nodes.
+    """
+
+    def __init__(self, words):
+        self._next_id = 0
+        self.root = self._new_node()
+        self._register = dict()
+        # Path of (parent, letter, child) edges from the last inserted word that
+        # have not yet been checked against the register.
+        self._unchecked = []
+        previous_word = ""
+        for word in words:
+            if word < previous_word:
+                raise ValueError(f"Words must be inserted in sorted order: '{word}' after '{previous_word}'")
+            self._insert(word, previous_word)
+            previous_word = word
+        self._minimize(0)
+        self.node_count = len(self._register) + 1
+        self.edge_count = sum(len(node.children) for node in self._register.values()) + len(self.root.children)
+        del self._register
+        del self._unchecked
+
+    def _new_node(self):
+        node = Node(self._next_id)
+        self._next_id += 1
+        return node
+
+    def _insert(self, word, previous_word):
+        common_prefix = 0
+        for letter, previous_letter in zip(word, previous_word):
+            if letter != previous_letter:
+                break
+            common_prefix += 1
+
+        # Everything past the shared prefix of the previous word is now final.
+        self._minimize(common_prefix)
+
+        if self._unchecked:
+            node = self._unchecked[-1][2]
+        else:
+            node = self.root
+        for letter in word[common_prefix:]:
+            child = self._new_node()
+            node.children[letter] = child
+            self._unchecked.append((node, letter, child))
+            node = child
+        node.is_word = True
+
+    def _minimize(self, down_to):
+        while len(self._unchecked) > down_to:
+            parent, letter, child = self._unchecked.pop()
+            key = child.signature()
+            existing = self._register.get(key)
+            if existing is not None:
+                parent.children[letter] = existing
+            else:
+                self._register[key] = child
+
+    def lookup(self, word):
+        current_node = self.root
+        for letter in word:
+            current_node = current_node.children.get(letter)
+            if current_node is None:
+                return None
+        return current_node
+
+    def is_word(self, word):
+        word_node = self.lookup(word)
+        if word_node is None:
+            return False
+        return word_node.is_word
+
+
+def build_dawg_from_file(file_name='lexicon/lexicon_basic.txt'):
+    with open(file_name, 'rt') as file:
+        words = sorted(line.strip() for line in file if line.strip())
+    return Dawg(words)
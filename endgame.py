@@ -0,0 +1,276 @@
+"""
+Exact endgame search for when the bag is empty.
+
+With no tiles left to draw, the opponent's rack is exactly the unseen tiles,
+so the rest of the game is a two-player game of perfect information. Its value
+is the spread the player to move gains from here to the end of the game:
+
+- A move that uses a player's last tile ends the game, and they also score
+  twice the value of the tiles left on the opponent's rack.
+- A player with no legal move passes. If the other player then has none
+  either, the game ends and each loses the value of their own rack.
+
+EndgameSolver searches this with negamax and alpha-beta. Move ordering tries
+the transposition table's best move first, then the rest by score (with the
+going-out bonus). Searches are iterative deepening: each depth reuses the table
+of the one before, and a line cut off at the depth limit is valued at the best
+score the player to move could make there. Once a depth completes with no line
+cut off, the result is exact and the search stops. When the time limit runs
+out, the choice of the deepest completed depth is returned.
+"""
+import time
+
+from game import rack_value
+from solver import make_solver
+
+# Transposition table bound types
+EXACT, LOWER, UPPER = 0, 1, 2
+# Table depth of an entry whose subtree reached the end of the game in every line
+SOLVED = 1 << 30
+
+
+class EndgameResult:
+    """Outcome of EndgameSolver.solve."""
+
+    def __init__(self, move, value, depth, line, solved, nodes, seconds):
+        self.move = move  # best move for the player to move, None if they must pass
+        self.value = value  # spread gained from here to the end of the game
+        self.depth = depth  # deepest completed depth, in plies
+        self.line = line  # the expected sequence of moves, starting with `move` (None for a pass)
+        self.solved = solved  # True if value is exact rather than depth-limited
+        self.nodes = nodes
+        self.seconds = seconds
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _remove_tiles(rack, tiles):
+    rest = list(rack)
+    for tile in tiles:
+        rest.remove(tile)
+    return rest
+
+
+class EndgameSolver:
+    """
+    Negamax search of an endgame.
+
+    Usage:
+        solver = EndgameSolver(lexicon, board, rack, opponent_rack)
+        result = solver.solve(time_limit=5.0)
+        move = result.move
+    """
+
+    def __init__(self, lexicon, board, rack, opponent_rack):
+        """
+        Args:
+            lexicon: Game's lexicon
+            board (Board): Current board (moves are tried on it and taken back)
+            rack (list): Rack of the player to move
+            opponent_rack (list): The other player's rack
+        """
+        self.lexicon = lexicon
+        self.board = board
+        self.rack = list(rack)
+        self.opponent_rack = list(opponent_rack)
+        # (hash, rack to move, other rack, passed) -> (depth, value, bound, best move)
+        self.table = dict()
+        # (hash, rack) -> that rack's moves on that board (see _moves)
+        self.move_lists = dict()
+        self.nodes = 0
+        self._horizon_cuts = 0
+        self._deadline = None
+        self._root_key = None
+        # (value, move) of the best root move found so far in the current depth
+        self._root_best = None
+
+    def _check_time(self):
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise _Timeout()
+
+    def _key(self, rack, other_rack, passed):
+        return self.board.zobrist_hash, ''.join(sorted(rack)), ''.join(sorted(other_rack)), passed
+
+    def _moves(self, rack, other_rack):
+        """
+        Legal moves for `rack` as (value, move) pairs, best first, where a move's
+        value is its score plus the going-out bonus if it uses the last tile.
+        Generated once per board and rack, so a node cut off at one depth costs
+        nothing to expand at the next.
+        """
+        key = self.board.zobrist_hash, ''.join(sorted(rack))
+        moves = self.move_lists.get(key)
+        if moves is None:
+            solver = make_solver(self.lexicon, self.board, list(rack))
+            solver.find_all_options()
+            bonus = 2 * rack_value(other_rack)
+            moves = [(move[4] + bonus if len(move[3]) == len(rack) else move[4], move) for move in solver.found_moves]
+            moves.sort(key=lambda pair: -pair[0])
+            self.move_lists[key] = moves
+        return moves
+
+    def _negamax(self, rack, other_rack, passed, depth, alpha, beta):
+        """Value of the position to the player holding `rack`, within the window (alpha, beta)."""
+        self._check_time()
+        self.nodes += 1
+        key = self._key(rack, other_rack, passed)
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            entry_depth, value, bound, best_move = entry
+            if entry_depth >= depth and (bound == EXACT or (bound == LOWER and value >= beta)
+                                         or (bound == UPPER and value <= alpha)):
+                if entry_depth != SOLVED:
+                    self._horizon_cuts += 1
+                return value
+
+        moves = self._moves(rack, other_rack)
+        if depth == 0 and moves:
+            # Cut off: count the best move available now, as if the rest of the game scored nothing
+            self._horizon_cuts += 1
+            return moves[0][0]
+        if not moves:
+            if passed:
+                # Neither player can move: each loses what is left on their rack
+                return rack_value(other_rack) - rack_value(rack)
+            # A pass does not use up depth; the other player moves or the game ends
+            return -self._negamax(other_rack, rack, True, depth, -beta, -alpha)
+        if best_move is not None:
+            # The table's best move first, then the rest best first
+            moves = [pair for pair in moves if pair[1] is best_move] + \
+                    [pair for pair in moves if pair[1] is not best_move]
+
+        cuts_before = self._horizon_cuts
+        original_alpha = alpha
+        best_value = None
+        for score, move in moves:
+            leave = _remove_tiles(rack, move[3])
+            if not leave:
+                value = score
+            else:
+                placed = self.board.apply_move(move[0], move[1], move[2])
+                try:
+                    # value = score - reply, so the reply's window is (score - beta, score - alpha)
+                    value = move[4] - self._negamax(other_rack, leave, False, depth - 1,
+                                                    move[4] - beta, move[4] - alpha)
+                finally:
+                    self.board.undo_move(placed)
+            if best_value is None or value > best_value:
+                best_value = value
+                best_move = move
+                if key == self._root_key:
+                    self._root_best = (best_value, best_move)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        entry_depth = SOLVED if self._horizon_cuts == cuts_before else depth
+        self.table[key] = (entry_depth, best_value, bound, best_move)
+        return best_value
+
+    def _principal_line(self, max_length):
+        """The table's best moves from the root, played out and taken back."""
+        line = []
+        placed_moves = []
+        rack, other_rack, passed = self.rack, self.opponent_rack, False
+        try:
+            while len(line) < max_length:
+                entry = self.table.get(self._key(rack, other_rack, passed))
+                if entry is None:
+                    # No entry: a pass, unless the game is over or the line was cut off here
+                    if passed or self._moves(rack, other_rack):
+                        break
+                    line.append(None)
+                    rack, other_rack, passed = other_rack, rack, True
+                    continue
+                move = entry[3]
+                line.append(move)
+                rack = _remove_tiles(rack, move[3])
+                if not rack:
+                    break
+                placed_moves.append(self.board.apply_move(move[0], move[1], move[2]))
+                rack, other_rack, passed = other_rack, rack, False
+        finally:
+            for placed in reversed(placed_moves):
+                self.board.undo_move(placed)
+        return line
+
+    def solve(self, time_limit=None, max_depth=14):
+        """
+        Iterative deepening from depth 1 up to `max_depth` plies, until the
+        endgame is solved or `time_limit` seconds have passed.
+
+        Returns:
+            EndgameResult: Best move and value of the deepest completed depth
+        """
+        start = time.perf_counter()
+        self._deadline = None if time_limit is None else start + time_limit
+        result = None
+        self._root_key = self._key(self.rack, self.opponent_rack, False)
+        try:
+            for depth in range(1, max_depth + 1):
+                self._horizon_cuts = 0
+                self._root_best = None
+                value = self._negamax(self.rack, self.opponent_rack, False, depth, float('-inf'), float('inf'))
+                solved = self._horizon_cuts == 0
+                line = self._principal_line(depth)
+                move = line[0] if line else None
+                result = EndgameResult(move, value, depth, line, solved, self.nodes, 0.0)
+                if solved:
+                    break
+        except _Timeout:
+            # The unfinished depth searched the previous best move first, so any root move it
+            # has found since to be better is better at this depth too.
+            if self._root_best is not None:
+                value, move = self._root_best
+                result = EndgameResult(move, value, result.depth if result else 0, [move], False, self.nodes, 0.0)
+        if result is None:
+            # Not even depth 1 reached a move: fall back on the move worth the most right now
+            moves = self._moves(self.rack, self.opponent_rack)
+            value, move = moves[0] if moves else (0, None)
+            result = EndgameResult(move, value, 0, [move] if move else [], False, self.nodes, 0.0)
+        result.seconds = time.perf_counter() - start
+        return result
+
+
+def random_endgame(dictionary, seed, max_tiles=14):
+    """
+    Build a reproducible endgame by greedy self-play from a seeded bag, until
+    the bag is empty and the two racks hold at most `max_tiles` tiles between them.
+
+    Returns:
+        tuple: (board, rack, opponent_rack) with `rack` to move, or None if the
+        game ends or stalls first
+    """
+    import random
+
+    from anagram import AnagramIndex, best_first_move
+    from board import Board
+    from game import ScrabbleBag
+
+    rng = random.Random(seed)
+    tiles = [letter for letter, count in ScrabbleBag.TILE_DISTRIBUTION.items() for _ in range(count)]
+    rng.shuffle(tiles)
+    board = Board(15)
+    racks = [[tiles.pop() for _ in range(7)] for _ in range(2)]
+    move = best_first_move(board, AnagramIndex.for_lexicon(dictionary), racks[0])
+    to_move = 0
+    while tiles or len(racks[0]) + len(racks[1]) > max_tiles:
+        if move is None:
+            return None
+        _, racks[to_move] = board.place_word(move[0], move[1], move[2], racks[to_move])
+        while tiles and len(racks[to_move]) < 7:
+            racks[to_move].append(tiles.pop())
+        if not racks[to_move]:
+            return None
+        to_move = 1 - to_move
+        move = make_solver(dictionary, board, list(racks[to_move])).best_move()
+    return board, racks[to_move], racks[1 - to_move]
@@ -0,0 +1,63 @@
+from game import Player
+from leave_values import LeaveTable
+
+
+class EquityAIPlayer(Player):
+    """
+    AI player that chooses the move with the highest equity: its score plus the
+    value of the tiles it leaves on the rack (see leave_values.py).
+    """
+
+    def __init__(self, name, leave_table_path="lexicon/leaves.bin", endgame_time_limit=5.0):
+        """
+        Args:
+            name (str): Player name
+            leave_table_path (str): Leave value table written by leave_values.py
+            endgame_time_limit (float): Seconds for the endgame solver once the bag is empty (None: never solve)
+        """
+        super().__init__(name)
+        self.endgame_time_limit = endgame_time_limit
+        self.leave_table = LeaveTable(leave_table_path)
+
+    def move_equity(self, move):
+        """Score of `move` plus the value of the tiles it keeps on the rack."""
+        leave = self.rack.copy()
+        for tile in move[3]:
+            leave.remove(tile)
+        return move[4] + self.leave_table.value(leave)
+
+    def choose_move(self, game_state):
+        """
+        Select the move with the highest equity from the list of legal moves.
+
+        Args:
+            game_state (dict): Dictionary containing:
+                - legal_moves (list): List of legal moves
+                - board (Board): Current state of the game board
+                - tile_distribution (dict): Original distribution of tiles
+                - bag_size (int): Number of tiles left in the bag
+
+        Returns:
+            int: Index of chosen move or 0 if no moves available
+        """
+        legal_moves = game_state['legal_moves']
+
+        # If no legal moves are available, end turn
+        if not legal_moves:
+            return 0
+
+        # With an empty bag there are no more draws, so the leave is worth nothing extra
+        if game_state.get('bag_size', 1) == 0:
+            equities = [move[4] for move in legal_moves]
+        else:
+            equities = [self.move_equity(move) for move in legal_moves]
+        best_move_index = max(range(len(legal_moves)), key=lambda i: (equities[i], -i)) + 1
+
+        # Print the chosen move for transparency
+        if self.verbose:
+            chosen_move = legal_moves[best_move_index - 1]
+            print(f"{self.name} chooses to play '{chosen_move[0]}' at {chosen_move[1]} "
+                  f"({chosen_move[2]}) for {chosen_move[4]} points "
+                  f"(equity {equities[best_move_index - 1]:.1f})")
+
+        return best_move_index
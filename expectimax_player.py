@@ -0,0 +1,66 @@
+from game import Player, unseen_tiles
+from search import ExpectimaxSearch
+import random
+
+
+class ExpectimaxPlayer(Player):
+    """
+    AI player that searches its top-scoring moves with expectimax (see search.py):
+    the opponent's best reply averaged over sampled racks, then our follow-up to
+    it, deepening while the time budget lasts.
+    """
+
+    def __init__(self, name, candidates=10, samples=8, reply_width=5, time_budget=2.0, max_depth=3, seed=None):
+        """
+        Args:
+            name (str): Player name
+            candidates (int): Number of top-scoring moves to search
+            samples (int): Opponent racks sampled per turn
+            reply_width (int): Opponent replies considered when searching our follow-up
+            time_budget (float): Seconds allowed for one move, endgames included
+            max_depth (int): Deepest search, in plies (1 plays the top-scoring move)
+            seed (int): Seed for the sampled racks; by default the global random module is used
+        """
+        super().__init__(name)
+        self.candidates = candidates
+        self.samples = samples
+        self.reply_width = reply_width
+        self.time_budget = time_budget
+        self.endgame_time_limit = time_budget
+        self.max_depth = max_depth
+        self.rng = random if seed is None else random.Random(seed)
+
+    def choose_move(self, game_state):
+        """
+        Choose the candidate move with the best searched value.
+
+        Args:
+            game_state (dict): Dictionary containing:
+                - legal_moves (list): List of legal moves
+                - board (Board): Current state of the game board
+                - tile_distribution (dict): Original distribution of tiles
+                - lexicon_tree: Game's lexicon tree
+
+        Returns:
+            int: Index of chosen move or 0 to end game
+        """
+        legal_moves = game_state['legal_moves']
+
+        # If no legal moves available, end turn
+        if not legal_moves:
+            return 0
+
+        unseen = unseen_tiles(game_state['board'], self.rack, game_state['tile_distribution'])
+        search = ExpectimaxSearch(game_state['lexicon_tree'], game_state['board'], self.rack, unseen,
+                                  self.candidates, self.samples, self.reply_width, self.rng)
+        result = search.search(legal_moves, self.time_budget, self.max_depth)
+        best_move_index = result.index + 1
+
+        if self.verbose:
+            chosen_move = legal_moves[result.index]
+            print(f"{self.name} chooses to play '{chosen_move[0]}' at {chosen_move[1]} "
+                  f"({chosen_move[2]}) for {chosen_move[4]} points")
+            print(f"Value {result.value:.1f} at depth {result.depth} "
+                  f"({result.solves} solves, {result.pruned} pruned, {result.seconds:.2f} s)")
+
+        return best_move_index
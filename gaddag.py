@@ -0,0 +1,218 @@
+"""
+GADDAG lexicon and move generator (Gordon 1994).
+
+For every word and every split point the GADDAG stores the reversed prefix,
+a separator, and the remaining suffix ("cat" -> "c>at", "ac>t", "tac"). Moves
+are generated outwards from each anchor: first leftwards through the reversed
+prefix, then across the separator and rightwards through the suffix, so no
+left parts have to be enumerated from the root and no `limit` has to be found.
+
+Usage:
+    python gaddag.py lexicon/lexicon_full.txt lexicon/lexicon_full.gaddag
+"""
+import sys
+
+from board import Board
+from compiled_lexicon import CompiledLexicon, compile_lexicon
+from dawg import Dawg
+from cross_check import BIT_LETTERS, LETTER_BITS, LETTER_INDEX, cross_check_mask
+from solver import SolveState
+
+SEPARATOR = '>'
+
+
+def gaddag_strings(word):
+    """All GADDAG paths for a word; the fully reversed word carries no separator."""
+    for split in range(1, len(word)):
+        yield word[:split][::-1] + SEPARATOR + word[split:]
+    yield word[::-1]
+
+
+class Gaddag:
+    """GADDAG over any node graph with `children` / `is_word` (a Dawg or a CompiledLexicon)."""
+
+    def __init__(self, root, compiled=None):
+        self.root = root
+        # The CompiledLexicon the graph was mapped from, if any.
+        self.compiled = compiled
+
+    @classmethod
+    def from_words(cls, words):
+        return cls(Dawg(sorted(path for word in words for path in gaddag_strings(word))).root)
+
+    def is_word(self, word):
+        current_node = self.root
+        for letter in reversed(word):
+            current_node = current_node.children.get(letter)
+            if current_node is None:
+                return False
+        return current_node.is_word
+
+    def cross_check_mask(self, letters_before, letters_after):
+        # The separator-free path of a word is the word reversed, so the roles of prefix and suffix swap.
+        return cross_check_mask(self.root, letters_after[::-1], letters_before[::-1])
+
+    def __reduce__(self):
+        # A mapped GADDAG is reopened by path in the receiving process, like CompiledLexicon.
+        if self.compiled is not None:
+            return build_gaddag_from_file, (self.compiled.file_name,)
+        return Gaddag, (self.root,)
+
+
+class GaddagSolveState(SolveState):
+    """
+    Drop-in replacement for SolveState that generates moves from a Gaddag.
+    Returns the same (word, pos, direction, used_rack, score) tuples.
+    """
+
+    def extend_before(self, pos, anchor_pos, partial_word, current_node,
+                      main_score, word_multiplier, cross_score, tiles_placed):
+        """Fill `pos`, at or left of the anchor, with the next letter of the reversed prefix."""
+        if self.board.is_filled(pos):
+            existing_letter = self.board.get_tile(pos)
+            # Blanks on the board are upper case; the lexicon only knows lower case.
+            child = current_node.children.get(existing_letter.lower())
+            if child is not None:
+                self.placed_before(pos, anchor_pos, existing_letter + partial_word, child,
+                                   main_score + Board.LETTER_SCORES[existing_letter],
+                                   word_multiplier, cross_score, tiles_placed)
+        else:
+            row, col = pos
+            letter_multiplier = self.letter_multipliers[row][col]
+            square_word_multiplier = self.word_multipliers[row][col]
+            cross_base = self.cross_word_results.get(pos)
+            rack_counts = self.rack_counts
+            allowed = self.rack_mask & self.cross_check_results[pos]
+            while allowed:
+                bit = allowed & -allowed
+                allowed ^= bit
+                next_letter = BIT_LETTERS[bit]
+                child = current_node.children.get(next_letter)
+                if child is not None:
+                    index = LETTER_INDEX[next_letter]
+                    rack_counts[index] -= 1
+                    if not rack_counts[index]:
+                        self.rack_mask ^= bit
+                    letter_score = Board.LETTER_SCORES[next_letter] * letter_multiplier
+                    self.placed_before(pos, anchor_pos, next_letter + partial_word, child,
+                                       main_score + letter_score,
+                                       word_multiplier * square_word_multiplier,
+                                       cross_score if cross_base is None else
+                                       cross_score + (cross_base + letter_score) * square_word_multiplier,
+                                       tiles_placed + 1)
+                    if not rack_counts[index]:
+                        self.rack_mask ^= bit
+                    rack_counts[index] += 1
+            if self.blank_count:
+                # A blank follows the GADDAG's edges instead of trying all 26 letters,
+                # and not as a letter still on the rack (see SolveState.before_part).
+                blank_allowed = self.cross_check_results[pos] & ~self.rack_mask
+                self.blank_count -= 1
+                for next_letter, child in current_node.children.items():
+                    if blank_allowed & LETTER_BITS.get(next_letter, 0):
+                        self.placed_before(pos, anchor_pos, next_letter.upper() + partial_word, child,
+                                           main_score,
+                                           word_multiplier * square_word_multiplier,
+                                           cross_score if cross_base is None else
+                                           cross_score + cross_base * square_word_multiplier,
+                                           tiles_placed + 1)
+                self.blank_count += 1
+
+    def placed_before(self, start_pos, anchor_pos, partial_word, current_node,
+                      main_score, word_multiplier, cross_score, tiles_placed):
+        left_pos = self.before(start_pos)
+        left_open = not self.board.is_filled(left_pos)
+        if current_node.is_word and left_open and not self.board.is_filled(self.after(anchor_pos)):
+            self.record_move(partial_word, start_pos,
+                             self.move_score(main_score, word_multiplier, cross_score, tiles_placed))
+        # New tiles may not be placed on an earlier anchor: that move is generated from that anchor.
+        if self.board.is_filled(left_pos) or (self.board.in_bounds(left_pos) and left_pos not in self.anchor_set):
+            self.extend_before(left_pos, anchor_pos, partial_word, current_node,
+                               main_score, word_multiplier, cross_score, tiles_placed)
+        if left_open and SEPARATOR in current_node.children:
+            self.extend_after_separator(self.after(anchor_pos), start_pos, partial_word,
+                                        current_node.children[SEPARATOR],
+                                        main_score, word_multiplier, cross_score, tiles_placed)
+
+    def extend_after_separator(self, pos, start_pos, partial_word, current_node,
+                               main_score, word_multiplier, cross_score, tiles_placed):
+        if self.board.is_filled(pos):
+            existing_letter = self.board.get_tile(pos)
+            child = current_node.children.get(existing_letter.lower())
+            if child is not None:
+                self.placed_after(pos, start_pos, partial_word + existing_letter, child,
+                                  main_score + Board.LETTER_SCORES[existing_letter],
+                                  word_multiplier, cross_score, tiles_placed)
+        elif self.board.in_bounds(pos):
+            row, col = pos
+            letter_multiplier = self.letter_multipliers[row][col]
+            square_word_multiplier = self.word_multipliers[row][col]
+            cross_base = self.cross_word_results.get(pos)
+            rack_counts = self.rack_counts
+            allowed = self.rack_mask & self.cross_check_results[pos]
+            while allowed:
+                bit = allowed & -allowed
+                allowed ^= bit
+                next_letter = BIT_LETTERS[bit]
+                child = current_node.children.get(next_letter)
+                if child is not None:
+                    index = LETTER_INDEX[next_letter]
+                    rack_counts[index] -= 1
+                    if not rack_counts[index]:
+                        self.rack_mask ^= bit
+                    letter_score = Board.LETTER_SCORES[next_letter] * letter_multiplier
+                    self.placed_after(pos, start_pos, partial_word + next_letter, child,
+                                      main_score + letter_score,
+                                      word_multiplier * square_word_multiplier,
+                                      cross_score if cross_base is None else
+                                      cross_score + (cross_base + letter_score) * square_word_multiplier,
+                                      tiles_placed + 1)
+                    if not rack_counts[index]:
+                        self.rack_mask ^= bit
+                    rack_counts[index] += 1
+            if self.blank_count:
+                blank_allowed = self.cross_check_results[pos] & ~self.rack_mask
+                self.blank_count -= 1
+                for next_letter, child in current_node.children.items():
+                    if blank_allowed & LETTER_BITS.get(next_letter, 0):
+                        self.placed_after(pos, start_pos, partial_word + next_letter.upper(), child,
+                                          main_score,
+                                          word_multiplier * square_word_multiplier,
+                                          cross_score if cross_base is None else
+                                          cross_score + cross_base * square_word_multiplier,
+                                          tiles_placed + 1)
+                self.blank_count += 1
+
+    def placed_after(self, end_pos, start_pos, partial_word, current_node,
+                     main_score, word_multiplier, cross_score, tiles_placed):
+        next_pos = self.after(end_pos)
+        if current_node.is_word and not self.board.is_filled(next_pos):
+            self.record_move(partial_word, start_pos,
+                             self.move_score(main_score, word_multiplier, cross_score, tiles_placed))
+        if self.board.in_bounds(next_pos):
+            self.extend_after_separator(next_pos, start_pos, partial_word, current_node,
+                                        main_score, word_multiplier, cross_score, tiles_placed)
+
+    def solve_anchor(self, anchor_pos):
+        self.extend_before(anchor_pos, anchor_pos, "", self.dictionary.root, 0, 1, 0, 0)
+
+
+Gaddag.solver_class = GaddagSolveState
+
+
+def build_gaddag_from_file(file_name='lexicon/lexicon_basic.txt'):
+    # Compiled GADDAGs are memory-mapped; word lists are expanded and minimized (slow for the full lexicon).
+    if file_name.endswith('.gaddag'):
+        compiled = CompiledLexicon(file_name)
+        return Gaddag(compiled.root, compiled)
+    with open(file_name, 'rt') as file:
+        return Gaddag.from_words(line.strip() for line in file if line.strip())
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python gaddag.py <words.txt> <output.gaddag>")
+        sys.exit(1)
+    source, target = sys.argv[1], sys.argv[2]
+    edge_count = compile_lexicon(build_gaddag_from_file(source), target)
+    print(f"Compiled {source} to {target} ({edge_count} edges)")
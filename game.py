@@ -1,7 +1,8 @@
 import random
-from letter_tree import build_tree_from_file
-from board import Board
-from itertools import permutations
+import time
+from letter_tree import load_lexicon
+from board import BLANK, Board
+from anagram import AnagramIndex, best_first_move
 
 
 class Player:
@@ -11,6 +12,11 @@ class Player:
         self.name = name
         self.rack = []
         self.score = 0
+        # AI players announce their choices only while verbose (headless simulations turn it off).
+        self.verbose = True
+        # Seconds the endgame solver may take once the bag is empty, or None to leave
+        # endgames to choose_move (see solve_endgame). AI players set it from their own budget.
+        self.endgame_time_limit = None
 
     def choose_move(self, game_state):
         """
@@ -21,12 +27,47 @@ class Player:
                 - legal_moves (list): List of legal moves for the player
                 - board (Board): Current state of the game board
                 - tile_distribution (dict): Original distribution of tiles in the bag
+                - lexicon_tree: Game's lexicon tree
+                - bag_size (int): Number of tiles left in the bag
 
         Returns:
             int: Index of chosen move or 0 to end game
         """
         raise NotImplementedError("Subclasses must implement choose_move method")
 
+    def solve_endgame(self, game_state):
+        """
+        Once the bag is empty the opponent's rack is exactly the unseen tiles, so
+        the rest of the game can be searched exactly (see endgame.py) instead of
+        estimated. ScrabbleGame asks for this before choose_move; the whole search,
+        set-up included, stays within endgame_time_limit.
+
+        Returns:
+            int: Index of the solver's move in game_state['legal_moves'] (1-based), or None
+            if the bag is not empty or this player does not solve endgames
+        """
+        legal_moves = game_state['legal_moves']
+        if self.endgame_time_limit is None or game_state.get('bag_size') != 0 or not legal_moves:
+            return None
+        deadline = time.perf_counter() + self.endgame_time_limit
+        from endgame import EndgameSolver
+        board = game_state['board']
+        opponent_rack = unseen_tiles(board, self.rack, game_state['tile_distribution'])
+        solver = EndgameSolver(game_state['lexicon_tree'], board, self.rack, opponent_rack)
+        result = solver.solve(max(deadline - time.perf_counter(), 0.0))
+        if result.move is None:
+            return None
+        if self.verbose:
+            print(f"{self.name} chooses to play '{result.move[0]}' at {result.move[1]} "
+                  f"({result.move[2]}) for {result.move[4]} points")
+            print(f"Endgame {'solved' if result.solved else f'searched to depth {result.depth}'}: "
+                  f"spread {result.value:+} over {len(result.line)} moves ({result.nodes} nodes)")
+        move_key = result.move[:3]
+        for i, move in enumerate(legal_moves, 1):
+            if move[:3] == move_key:
+                return i
+        return None
+
 
 class HumanPlayer(Player):
     """Human player implementation."""
@@ -94,9 +135,10 @@ class GreedyAIPlayer(Player):
                 best_move_index = i
 
         # Print the chosen move for transparency
-        chosen_move = legal_moves[best_move_index - 1]
-        print(f"{self.name} chooses to play '{chosen_move[0]}' at {chosen_move[1]} "
-              f"({chosen_move[2]}) for {chosen_move[4]} points")
+        if self.verbose:
+            chosen_move = legal_moves[best_move_index - 1]
+            print(f"{self.name} chooses to play '{chosen_move[0]}' at {chosen_move[1]} "
+                  f"({chosen_move[2]}) for {chosen_move[4]} points")
 
         return best_move_index
 
@@ -109,7 +151,7 @@ class ScrabbleBag:
         'a': 9, 'b': 2, 'c': 2, 'd': 4, 'e': 12, 'f': 2, 'g': 3, 'h': 2,
         'i': 9, 'j': 1, 'k': 1, 'l': 4, 'm': 2, 'n': 6, 'o': 8, 'p': 2,
         'q': 1, 'r': 6, 's': 4, 't': 6, 'u': 4, 'v': 2, 'w': 2, 'x': 1,
-        'y': 2, 'z': 1
+        'y': 2, 'z': 1, '?': 2
     }
 
     def __init__(self):
@@ -119,6 +161,13 @@ class ScrabbleBag:
             self.tiles.extend([letter] * count)
         random.shuffle(self.tiles)
 
+    @classmethod
+    def from_tiles(cls, tiles):
+        """Bag holding exactly `tiles`, drawn in the given order."""
+        bag = cls.__new__(cls)
+        bag.tiles = list(tiles)
+        return bag
+
     def draw_tiles(self, num_tiles):
         """
         Draw specified number of tiles from the bag.
@@ -138,16 +187,45 @@ class ScrabbleBag:
         return len(self.tiles) == 0
 
 
+def unseen_tiles(board, rack, tile_distribution=ScrabbleBag.TILE_DISTRIBUTION):
+    """
+    Tiles that are neither on the board nor on `rack`: the bag plus the opponent's rack.
+    Blanks on the board (upper-case letters) count as blanks.
+
+    Returns:
+        list: Unseen tiles
+    """
+    unseen = dict(tile_distribution)
+    for pos in board.all_positions():
+        tile = board.get_tile(pos)
+        if tile:
+            tile = BLANK if tile.isupper() else tile
+            if unseen.get(tile, 0) > 0:
+                unseen[tile] -= 1
+    for tile in rack:
+        if unseen.get(tile, 0) > 0:
+            unseen[tile] -= 1
+    return [tile for tile, count in unseen.items() for _ in range(count)]
+
+
+def rack_value(rack):
+    """Total letter score of the tiles on `rack` (blanks count 0)."""
+    return sum(Board.LETTER_SCORES[tile] for tile in rack)
+
+
 class ScrabbleGame:
     """Main game class to control game flow."""
 
-    def __init__(self, player1, player2):
+    def __init__(self, player1, player2, lexicon_path="lexicon/lexicon_full.dawg", lexicon_tree=None, verbose=True):
         """
         Initialize the game.
 
         Args:
             player1_name (str): Name of first player
             player2_name (str): Name of second player
+            lexicon_path (str): Word list (.txt) or compiled lexicon (.dawg) to play with
+            lexicon_tree: Already loaded lexicon to share between games (lexicon_path is then ignored)
+            verbose (bool): Print the game as it is played and render the final board
         """
 
         # Validate input types
@@ -156,7 +234,15 @@ class ScrabbleGame:
 
         # Initialize board and lexicon
         self.board = Board(15)
-        self.lexicon_tree = build_tree_from_file(file_name="lexicon/lexicon_full.txt")
+        if lexicon_tree is None:
+            # Shared with every other game and player that loads the same file
+            lexicon_tree = load_lexicon(lexicon_path)
+        self.lexicon_tree = lexicon_tree
+        self.verbose = verbose
+        # One entry per move played: player, rack before the move, word, pos, direction, score
+        # and seconds spent choosing it. End-of-game rack adjustments are entries with player,
+        # rack, end_rack (the tiles counted) and score instead of word, pos and direction.
+        self.move_log = []
 
         # Initialize bag and players
         self.bag = ScrabbleBag()
@@ -178,30 +264,37 @@ class ScrabbleGame:
         """
         # First move must be played on center tile at (7,7)
         starting_player = self.players[self.current_player_idx]
-        print(f"{starting_player.name} starts the game!")
+        self._announce(f"{starting_player.name} starts the game!")
 
         # Try to find a valid first word
         valid_first_move = self._find_first_move(starting_player)
 
         if not valid_first_move:
-            print("No valid first move found. Ending game.")
+            self._announce("No valid first move found. Ending game.")
             return self._end_game()
 
+        # The other player makes the next move
+        self._switch_player()
+
         # Continue game until a player chooses to end
         while True:
             current_player = self.players[self.current_player_idx]
+            turn_start = time.perf_counter()
 
             # Find legal moves
             solver = self._get_legal_moves(current_player)
             legal_moves = solver.found_moves
 
             if not legal_moves:
-                print(f"No moves available for {current_player.name}. Skipping turn.")
+                self._announce(f"No moves available for {current_player.name}. Skipping turn.")
                 self.consecutive_skips += 1
 
                 # If both players have been skipped consecutively, end the game
                 if self.consecutive_skips >= 2:
-                    print("\nNeither player has any available moves. Game ending.")
+                    self._announce("\nNeither player has any available moves. Game ending.")
+                    # Each player loses the value of the tiles left on their rack
+                    for player in self.players:
+                        self._adjust_score(player, player.rack, -rack_value(player.rack))
                     return self._end_game()
 
                 self._switch_player()
@@ -215,11 +308,14 @@ class ScrabbleGame:
                 'legal_moves': legal_moves,
                 'board': self.board,
                 'tile_distribution': ScrabbleBag.TILE_DISTRIBUTION,
-                'lexicon_tree': self.lexicon_tree
+                'lexicon_tree': self.lexicon_tree,
+                'bag_size': len(self.bag.tiles)
             }
 
-            # Ask player to choose move
-            move_choice = current_player.choose_move(game_state)
+            # Ask player to choose move; AI players solve the endgame once the bag is empty
+            move_choice = current_player.solve_endgame(game_state)
+            if move_choice is None:
+                move_choice = current_player.choose_move(game_state)
 
             # Check if game is ending
             if move_choice == 0:
@@ -227,14 +323,23 @@ class ScrabbleGame:
 
             # Execute chosen move
             chosen_move = legal_moves[move_choice - 1]
-            self._execute_move(current_player, chosen_move)
+            self._execute_move(current_player, chosen_move, time.perf_counter() - turn_start)
+
+            # Using the last tile with the bag empty ends the game, for twice the opponent's rack value
+            if not current_player.rack and self.bag.is_empty():
+                opponent = self.players[1 - self.current_player_idx]
+                bonus = 2 * rack_value(opponent.rack)
+                self._adjust_score(current_player, opponent.rack, bonus)
+                self._announce(f"{current_player.name} goes out and scores {bonus} for "
+                               f"{opponent.name}'s remaining tiles!")
+                return self._end_game()
 
             # Switch to next player
             self._switch_player()
 
     def _find_first_move(self, player):
         """
-        Find a valid first move for the starting player by brute force searching the lexicon tree.
+        Play the highest-scoring opening through the center square for the starting player.
 
         Args:
             player (Player): Starting player
@@ -242,18 +347,14 @@ class ScrabbleGame:
         Returns:
             bool: True if a first move was successfully played, False otherwise
         """
-        # Generate all possible word combinations from the player's rack
-        rack = player.rack
-        for length in range(1, len(rack) + 1):
-            for perm in permutations(rack, length):
-                word = ''.join(perm)
-                if self.lexicon_tree.is_word(word):
-                    # Play the first valid word found
-                    first_move = (word, (7, 7), 'across', rack, 0)
-                    self._execute_move(player, first_move)
-                    return True
-
-        return False
+        turn_start = time.perf_counter()
+        # Every word formable from the rack comes straight from the alphagram index
+        anagram_index = AnagramIndex.for_lexicon(self.lexicon_tree)
+        first_move = best_first_move(self.board, anagram_index, player.rack)
+        if first_move is None:
+            return False
+        self._execute_move(player, first_move, time.perf_counter() - turn_start)
+        return True
 
     def _get_legal_moves(self, player):
         """
@@ -265,22 +366,24 @@ class ScrabbleGame:
         Returns:
             SolveState: Solver with found legal moves
         """
-        from solver import SolveState
-        solver = SolveState(self.lexicon_tree, self.board, player.rack.copy())
+        from solver import make_solver
+        solver = make_solver(self.lexicon_tree, self.board, player.rack.copy())
         solver.find_all_options()
         return solver
 
-    def _execute_move(self, player, move):
+    def _execute_move(self, player, move, seconds=0.0):
         """
         Execute a player's move.
 
         Args:
             player (Player): Player making the move
             move (tuple): Move details (word, pos, direction, original_rack, score)
+            seconds (float): Time taken to find and choose the move
         """
         word, pos, direction, original_rack, score = move
 
         # Place word on board
+        rack = ''.join(player.rack)
         remaining_rack = player.rack.copy()
         result_score, remaining_rack = self.board.place_word(
             word, pos, direction, player.rack
@@ -296,7 +399,19 @@ class ScrabbleGame:
             new_tiles = self.bag.draw_tiles(tiles_to_draw)
             player.rack.extend(new_tiles)
 
-        print(f"{player.name} plays '{word}' at {pos} {direction} for {result_score} points!")
+        self.move_log.append({'player': player.name, 'rack': rack, 'word': word, 'pos': list(pos),
+                              'direction': direction, 'score': result_score, 'seconds': seconds})
+        self._announce(f"{player.name} plays '{word}' at {pos} {direction} for {result_score} points!")
+
+    def _adjust_score(self, player, end_rack, points):
+        """Add an end-of-game rack adjustment to a player's score and the move log."""
+        player.score += points
+        self.move_log.append({'player': player.name, 'rack': ''.join(player.rack), 'end_rack': ''.join(end_rack),
+                              'score': points, 'seconds': 0.0})
+
+    def _announce(self, message):
+        if self.verbose:
+            print(message)
 
     def _switch_player(self):
         """Switch to the other player."""
@@ -304,6 +419,8 @@ class ScrabbleGame:
 
     def _end_game(self):
         """End the game and display final scores."""
+        if not self.verbose:
+            return
         print("\n--- GAME OVER ---")
         print(f"Final Board:")
         print(self.board)
@@ -0,0 +1,237 @@
+"""
+Opt-in instrumentation for the move generators.
+
+`instrumented_solver` returns a solver of the same engine as `make_solver`, but
+built from a subclass whose generation methods are wrapped to count calls and
+time the phase they belong to. Ordinary solvers are untouched, so leaving the
+instrumentation off costs nothing.
+
+Phase times are exclusive: time spent in a nested call of another phase (say,
+scoring a move found while extending right) counts only towards that phase.
+The timer calls themselves slow an instrumented solve down, so compare phase
+shares and counts rather than absolute times with an ordinary solve.
+
+Usage:
+    python instrumentation.py positions/*.txt
+    python instrumentation.py --seeds 20 --save positions --json
+
+A position file is the board as str(board) prints it (one line per row, '_'
+for an empty square, blanks in upper case) followed by a line with the rack.
+"""
+import argparse
+import json
+import os
+import time
+
+from board import Board
+from letter_tree import build_tree_from_file
+from solver import make_solver, random_board
+
+PHASES = ['anchors', 'cross_checks', 'left_part', 'extend_right', 'scoring']
+
+# Generation methods of either engine and the phase each belongs to. Methods a
+# solver class does not have are skipped.
+METHOD_PHASES = {
+    'find_anchors': 'anchors',
+    'anchor_context': 'anchors',
+    'cross_check': 'cross_checks',
+    'cross_word_scores': 'cross_checks',
+    'before_part': 'left_part',
+    'extend_after': 'extend_right',
+    # GaddagSolveState
+    'extend_before': 'left_part',
+    'placed_before': 'left_part',
+    'extend_after_separator': 'extend_right',
+    'placed_after': 'extend_right',
+    'legal_move': 'scoring',
+    'record_move': 'scoring',
+    'move_score': 'scoring',
+}
+# Each call of these visits one lexicon node.
+TRAVERSAL_METHODS = ['before_part', 'extend_after', 'extend_before', 'placed_before',
+                     'extend_after_separator', 'placed_after']
+
+
+class SolveStats:
+    """Call counts, cross-check lookups and exclusive per-phase times of one instrumented solver."""
+
+    def __init__(self):
+        self.calls = {name: 0 for name in METHOD_PHASES}
+        self.calls['solve_anchor'] = 0
+        self.cross_check_lookups = 0
+        self.phase_seconds = {phase: 0.0 for phase in PHASES + ['other']}
+        self.total_seconds = 0.0
+        self._phases = ['other']
+        self._phase_start = None
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        self.phase_seconds[self._phases[-1]] += now - self._phase_start
+        self._phases.append(phase)
+        self._phase_start = now
+
+    def exit(self):
+        now = time.perf_counter()
+        self.phase_seconds[self._phases.pop()] += now - self._phase_start
+        self._phase_start = now
+
+    def report(self, solver):
+        """Structured summary, ready for json.dumps."""
+        return {
+            'engine': type(solver).__mro__[1].__name__,
+            'moves': len(solver.found_moves),
+            'anchors': self.calls['solve_anchor'],
+            'nodes_visited': sum(self.calls[name] for name in TRAVERSAL_METHODS),
+            'cross_check_lookups': self.cross_check_lookups,
+            'score_calls': self.calls['move_score'],
+            'calls': {name: count for name, count in self.calls.items() if count},
+            'seconds': self.total_seconds,
+            'phase_seconds': self.phase_seconds,
+        }
+
+
+class CountingChecks(dict):
+    """A direction's cross-check table that counts lookups for SolveStats."""
+
+    def __init__(self, checks, stats):
+        super().__init__(checks)
+        self.stats = stats
+
+    def __getitem__(self, pos):
+        self.stats.cross_check_lookups += 1
+        return super().__getitem__(pos)
+
+    def get(self, pos, default=None):
+        self.stats.cross_check_lookups += 1
+        return super().get(pos, default)
+
+
+def _counted(name, method):
+    def wrapper(self, *args):
+        self.stats.calls[name] += 1
+        return method(self, *args)
+    return wrapper
+
+
+def _timed(name, phase, method):
+    def wrapper(self, *args):
+        stats = self.stats
+        stats.calls[name] += 1
+        stats.enter(phase)
+        try:
+            return method(self, *args)
+        finally:
+            stats.exit()
+    return wrapper
+
+
+_instrumented_classes = dict()
+
+
+def instrumented_class(solver_class):
+    """Subclass of `solver_class` with every generation method counted and timed (created once per class)."""
+    result = _instrumented_classes.get(solver_class)
+    if result is not None:
+        return result
+
+    def start_direction(self, direction):
+        anchors = solver_class.start_direction(self, direction)
+        self.cross_check_results = CountingChecks(self.cross_check_results, self.stats)
+        self.cross_word_results = CountingChecks(self.cross_word_results, self.stats)
+        return anchors
+
+    def generate(self):
+        self.stats._phase_start = start = time.perf_counter()
+        try:
+            yield from solver_class.generate(self)
+        finally:
+            self.stats.exit()
+            self.stats._phases.append('other')
+            self.stats.total_seconds += time.perf_counter() - start
+
+    namespace = {'start_direction': start_direction, 'generate': generate,
+                 'solve_anchor': _counted('solve_anchor', solver_class.solve_anchor)}
+    for name, phase in METHOD_PHASES.items():
+        if hasattr(solver_class, name):
+            namespace[name] = _timed(name, phase, getattr(solver_class, name))
+    result = type('Instrumented' + solver_class.__name__, (solver_class,), namespace)
+    _instrumented_classes[solver_class] = result
+    return result
+
+
+def instrumented_solver(dictionary, board, rack):
+    """
+    Like make_solver, but the solver keeps a SolveStats in `stats`:
+
+        solver = instrumented_solver(dictionary, board, rack)
+        solver.find_all_options()
+        print(solver.stats.report(solver))
+    """
+    solver_class = type(make_solver(dictionary, board, rack))
+    solver = instrumented_class(solver_class)(dictionary, board, rack)
+    solver.stats = SolveStats()
+    return solver
+
+
+def save_position(file_name, board, rack):
+    with open(file_name, 'w') as file:
+        file.write(str(board) + '\n' + ''.join(rack) + '\n')
+
+
+def load_position(file_name):
+    """
+    Returns:
+        tuple: (board, rack) saved by save_position
+    """
+    with open(file_name) as file:
+        lines = [line.strip() for line in file]
+    # The board is square, so its first row gives the number of rows; the next line is the rack.
+    start = next(i for i, line in enumerate(lines) if line)
+    size = len(lines[start])
+    rack = lines[start + size] if start + size < len(lines) else ''
+    return Board.from_string('\n'.join(lines[start:start + size])), list(rack)
+
+
+def format_report(name, report):
+    lines = [f"{name}: {report['engine']}, {report['moves']} moves, {report['seconds'] * 1000:.1f} ms",
+             f"  anchors {report['anchors']}, nodes visited {report['nodes_visited']}, "
+             f"cross-check lookups {report['cross_check_lookups']}, score calls {report['score_calls']}"]
+    for phase, seconds in report['phase_seconds'].items():
+        share = seconds / report['seconds'] if report['seconds'] else 0.0
+        lines.append(f"  {phase:<14}{seconds * 1000:>10.2f} ms{share:>8.1%}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile move generation on saved positions")
+    parser.add_argument('positions', nargs='*', help="position files written by save_position")
+    parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    parser.add_argument('--seeds', type=int, default=0, help="also profile this many seeded random boards")
+    parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+    parser.add_argument('--save', metavar='DIR', help="save the seeded boards as position files in DIR")
+    parser.add_argument('--json', action='store_true', help="print one JSON report per line")
+    args = parser.parse_args()
+
+    lexicon = build_tree_from_file(args.lexicon)
+    positions = [(file_name, *load_position(file_name)) for file_name in args.positions]
+    for seed in range(args.seeds):
+        board, rack = random_board(lexicon, seed, args.moves)
+        name = f"seed{seed}"
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            name = os.path.join(args.save, f"{name}.txt")
+            save_position(name, board, rack)
+        positions.append((name, board, rack))
+
+    for name, board, rack in positions:
+        solver = instrumented_solver(lexicon, board, rack)
+        solver.find_all_options()
+        report = solver.stats.report(solver)
+        if args.json:
+            print(json.dumps({'position': name, **report}))
+        else:
+            print(format_report(name, report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Rack leave values: how much the tiles kept after a move are worth on later turns.
+
+The table holds a value for every multiset of up to 6 tiles, stored as a flat
+array of 16-bit tenths of a point in a memory-mapped file. A leave is looked up
+by its rank among all sorted leaves of its size (the combinatorial number
+system), so a lookup is a handful of additions with no hashing or parsing.
+
+The values come from greedy self-play: for every move we record the leave and
+what the same player scores on their next turn, fit a per-tile model with
+duplicate and vowel/consonant balance terms by least squares, and tabulate it
+for every leave.
+
+Usage:
+    python leave_values.py lexicon/lexicon_full.dawg lexicon/leaves.bin --games 400
+"""
+import argparse
+import mmap
+import random
+import struct
+import sys
+from array import array
+from itertools import combinations_with_replacement
+from math import comb
+
+MAGIC = b'LEAV'
+VERSION = 1
+# magic, version, alphabet length, maximum leave size; followed by the alphabet
+HEADER = struct.Struct('<4sIII')
+# Values are stored as integer tenths of a point.
+SCALE = 10
+MAX_LEAVE = 6
+
+VOWELS = set('aeiou')
+# Copies of a letter beyond this share one duplicate term.
+MAX_COPIES = 3
+
+
+def leave_offsets(alphabet_size, max_leave=MAX_LEAVE):
+    """Index of the first leave of each size: sizes are stored one after another, smallest first."""
+    offsets = [0]
+    for size in range(max_leave + 1):
+        offsets.append(offsets[-1] + comb(alphabet_size + size - 1, size))
+    return offsets
+
+
+def leave_rank(indices):
+    """
+    Rank of a sorted multiset of letter indices among the multisets of its size.
+
+    Adding i to the i-th index makes the multiset a strictly increasing
+    combination, whose colexicographic rank is a sum of binomials.
+    """
+    return sum(comb(index + i, i + 1) for i, index in enumerate(indices))
+
+
+class LeaveTable:
+    """Read-only leave values backed by a memory-mapped table file."""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, alphabet_size, max_leave = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file_name} is not a version {VERSION} leave table")
+        if sys.byteorder != 'little':
+            raise ValueError("Leave tables can only be memory-mapped on little-endian machines")
+        self.alphabet = self._mmap[HEADER.size:HEADER.size + alphabet_size].decode('ascii')
+        self.max_leave = max_leave
+        self._letter_index = {letter: index for index, letter in enumerate(self.alphabet)}
+        self._offsets = leave_offsets(alphabet_size, max_leave)
+        start = HEADER.size + alphabet_size
+        self._values = memoryview(self._mmap)[start:start + 2 * self._offsets[-1]].cast('h')
+        # comb(index + i, i + 1) for every index and position, so a rank is only additions.
+        self._rank_terms = [[comb(index + i, i + 1) for index in range(alphabet_size)] for i in range(max_leave)]
+
+    def value(self, leave):
+        """
+        Value of keeping `leave` on the rack, in points.
+
+        Args:
+            leave: Tiles kept, in any order (at most max_leave of them)
+
+        Returns:
+            float: Leave value
+        """
+        letter_index = self._letter_index
+        indices = sorted(letter_index[letter] for letter in leave)
+        rank = self._offsets[len(indices)]
+        for i, index in enumerate(indices):
+            rank += self._rank_terms[i][index]
+        return self._values[rank] / SCALE
+
+    def __reduce__(self):
+        return LeaveTable, (self.file_name,)
+
+
+def leave_features(leave):
+    """
+    Model features of a leave: one per copy of each letter (later copies of a
+    letter are usually worth less), and one per (leave size, vowel count) pair.
+    """
+    features = []
+    copies = dict()
+    vowels = 0
+    for letter in leave:
+        copies[letter] = copies.get(letter, 0) + 1
+        features.append(('tile', letter, min(copies[letter], MAX_COPIES)))
+        if letter in VOWELS:
+            vowels += 1
+    if leave:
+        features.append(('balance', len(leave), vowels))
+    return features
+
+
+def collect_leave_samples(lexicon, games, seed=0):
+    """
+    Play greedy self-play games and record, for each move, the leave and the
+    score of the same player's next move. Moves after which the rack could not
+    be refilled are skipped, since their leave is not followed by a normal draw.
+
+    Returns:
+        list: (leave, next_score) pairs
+    """
+    from game import GreedyAIPlayer, ScrabbleGame
+
+    class RecordingPlayer(GreedyAIPlayer):
+        def choose_move(self, game_state):
+            choice = super().choose_move(game_state)
+            if choice:
+                move = game_state['legal_moves'][choice - 1]
+                leave = self.rack.copy()
+                for tile in move[3]:
+                    leave.remove(tile)
+                refilled = game_state['bag_size'] >= len(move[3])
+                self.history.append((leave, move[4], refilled))
+            return choice
+
+    samples = []
+    for game_index in range(games):
+        random.seed(seed + game_index)
+        players = [RecordingPlayer("Recorder 1"), RecordingPlayer("Recorder 2")]
+        for player in players:
+            player.verbose = False
+            player.history = []
+        ScrabbleGame(players[0], players[1], lexicon_tree=lexicon, verbose=False).start_game()
+        for player in players:
+            for (leave, _, refilled), (_, next_score, _) in zip(player.history, player.history[1:]):
+                if refilled and len(leave) <= MAX_LEAVE:
+                    samples.append((leave, next_score))
+    return samples
+
+
+def fit_leave_model(samples, ridge=20.0):
+    """
+    Least-squares fit of next-turn score = base + sum of leave feature weights,
+    with ridge regularization so that rare features stay near zero.
+
+    Returns:
+        dict: Feature -> weight (the base is not included, so the empty leave is worth 0)
+    """
+    feature_ids = {'base': 0}
+    rows = []
+    for leave, next_score in samples:
+        row = [0]
+        for feature in leave_features(leave):
+            row.append(feature_ids.setdefault(feature, len(feature_ids)))
+        rows.append((row, next_score))
+
+    # Normal equations (X^T X + ridge I) w = X^T y, built from the sparse rows.
+    size = len(feature_ids)
+    matrix = [[0.0] * size for _ in range(size)]
+    vector = [0.0] * size
+    for row, next_score in rows:
+        for i in row:
+            vector[i] += next_score
+            for j in row:
+                matrix[i][j] += 1
+    for i in range(1, size):
+        matrix[i][i] += ridge
+
+    # Gaussian elimination with partial pivoting.
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda r: abs(matrix[r][column]))
+        matrix[column], matrix[pivot] = matrix[pivot], matrix[column]
+        vector[column], vector[pivot] = vector[pivot], vector[column]
+        for r in range(column + 1, size):
+            factor = matrix[r][column] / matrix[column][column]
+            if factor:
+                for c in range(column, size):
+                    matrix[r][c] -= factor * matrix[column][c]
+                vector[r] -= factor * vector[column]
+    weights = [0.0] * size
+    for r in range(size - 1, -1, -1):
+        weights[r] = (vector[r] - sum(matrix[r][c] * weights[c] for c in range(r + 1, size))) / matrix[r][r]
+
+    return {feature: weights[index] for feature, index in feature_ids.items() if feature != 'base'}
+
+
+def write_leave_table(model, file_name, alphabet, max_leave=MAX_LEAVE):
+    """
+    Tabulate `model` for every leave of up to `max_leave` tiles over `alphabet`.
+
+    Returns:
+        int: Number of leaves written
+    """
+    offsets = leave_offsets(len(alphabet), max_leave)
+    values = array('h', [0]) * offsets[-1]
+    for size in range(max_leave + 1):
+        for indices in combinations_with_replacement(range(len(alphabet)), size):
+            leave = [alphabet[index] for index in indices]
+            value = sum(model.get(feature, 0.0) for feature in leave_features(leave))
+            values[offsets[size] + leave_rank(indices)] = max(-32768, min(32767, round(value * SCALE)))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    with open(file_name, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(alphabet), max_leave))
+        file.write(alphabet.encode('ascii'))
+        values.tofile(file)
+    return len(values)
+
+
+def main():
+    from game import ScrabbleBag
+    from letter_tree import build_tree_from_file
+
+    parser = argparse.ArgumentParser(description="Generate a leave value table from greedy self-play")
+    parser.add_argument('lexicon')
+    parser.add_argument('output')
+    parser.add_argument('--games', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    samples = collect_leave_samples(build_tree_from_file(args.lexicon), args.games, args.seed)
+    model = fit_leave_model(samples)
+    count = write_leave_table(model, args.output, ''.join(sorted(ScrabbleBag.TILE_DISTRIBUTION)))
+    print(f"Fitted {len(model)} features on {len(samples)} moves, wrote {count} leaves to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
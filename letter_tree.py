@@ -1,3 +1,8 @@
+import os
+
+from dawg import build_dawg_from_file
+from compiled_lexicon import CompiledLexicon
+
 class LetterTreeNode:
     def __init__(self, is_word):
         self.is_word = is_word
@@ -29,16 +34,47 @@ class LetterTree:
         return word_node.is_word
 
 def build_tree_from_file(file_name = 'lexicon/lexicon_basic.txt'):
-    with open(file_name, 'rt') as file:
-        words = []
-        for line in file:
-            word = line.strip()
-            words.append(word)
-    return LetterTree(words)
+    # Compiled lexicons (see compiled_lexicon.py) are memory-mapped instead of rebuilt.
+    if file_name.endswith('.dawg'):
+        return CompiledLexicon(file_name)
+    # GADDAG lexicons also select the GADDAG move generator (see solver.make_solver).
+    if file_name.endswith('.gaddag'):
+        from gaddag import build_gaddag_from_file
+        return build_gaddag_from_file(file_name)
+    # The minimized DAWG has the same root / children / is_word / lookup surface as
+    # LetterTree but shares suffixes, so it is what the game and solver load.
+    return build_dawg_from_file(file_name)
+
+# Lexicons loaded by load_lexicon: absolute path -> (file mtime when loaded, lexicon)
+_lexicon_registry = dict()
+
+def load_lexicon(file_name='lexicon/lexicon_basic.txt'):
+    """
+    The process-wide instance of a lexicon file, loaded on first use.
 
-from graphviz import Digraph
+    Lexicons are not modified after they are built, so every game, player and
+    solver in the process can share one. The file's mtime is part of the key:
+    a lexicon file rebuilt on disk is loaded again on the next call.
+    """
+    path = os.path.abspath(file_name)
+    mtime = os.stat(path).st_mtime_ns
+    entry = _lexicon_registry.get(path)
+    if entry is None or entry[0] != mtime:
+        entry = (mtime, build_tree_from_file(file_name))
+        _lexicon_registry[path] = entry
+    return entry[1]
+
+def evict_lexicon(file_name=None):
+    """Forget a loaded lexicon, or every one with no argument. Instances already handed out stay usable."""
+    if file_name is None:
+        _lexicon_registry.clear()
+    else:
+        _lexicon_registry.pop(os.path.abspath(file_name), None)
 
 def visualize_tree(tree, file_path="assets/lexicon_tree"):
+    # graphviz is only needed here, so importing letter_tree does not pay for it
+    from graphviz import Digraph
+
     dot = Digraph(comment='Letter Tree')
     dot.attr(rankdir="LR", dpi="300")
 
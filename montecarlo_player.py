@@ -0,0 +1,154 @@
+from game import Player, unseen_tiles
+from solver import PreparedBoard, make_solver
+import heapq
+import random
+import time
+
+
+class MonteCarloPlayer(Player):
+    """
+    AI player that simulates the next turns for its best-scoring candidate moves.
+
+    Each round draws one opponent rack from the unseen tiles and, for every
+    candidate, plays the candidate, lets the opponent make their best reply and
+    (with two plies) makes our best reply to that from our leave plus a fresh
+    draw. The candidate with the highest average equity (our points minus the
+    opponent's) over the completed rounds is played. Rounds are repeated until
+    the time budget runs out, checking it before every solve, so more time means
+    more samples and a move is never more than one solve late.
+    """
+
+    def __init__(self, name, candidates=10, time_budget=2.0, plies=2, seed=None):
+        """
+        Args:
+            name (str): Player name
+            candidates (int): Number of top-scoring moves to simulate
+            time_budget (float): Seconds allowed for simulating one move, or for solving it once the bag is empty
+            plies (int): 1 to simulate the opponent's reply only, 2 to add our reply to it
+            seed (int): Seed for the sampled racks; by default the global random module is used
+        """
+        super().__init__(name)
+        self.candidates = candidates
+        self.time_budget = time_budget
+        self.endgame_time_limit = time_budget
+        self.plies = plies
+        self.rng = random if seed is None else random.Random(seed)
+
+    def _unseen_tiles(self, game_state):
+        """
+        Tiles that are either in the bag or on the opponent's rack.
+
+        Returns:
+            list: Unseen tiles
+        """
+        return unseen_tiles(game_state['board'], self.rack, game_state['tile_distribution'])
+
+    def _leave(self, move):
+        """Tiles left on our rack after playing `move`."""
+        leave = self.rack.copy()
+        for tile in move[3]:
+            leave.remove(tile)
+        return leave
+
+    def _simulate(self, prepared, move, opponent_rack, bag, lexicon_tree, deadline):
+        """
+        Play out the replies that follow `move`, taking them back afterwards.
+
+        Args:
+            prepared (PreparedBoard): The position after our candidate move, left unchanged
+            move (tuple): Our candidate move
+            opponent_rack (list): Sampled opponent rack
+            bag (list): Shuffled unseen tiles not on the sampled opponent rack
+            lexicon_tree: Game's lexicon tree
+            deadline (float): time.perf_counter() value after which no further solve is started
+
+        Returns:
+            int: Equity of the candidate in this sample, or None if the deadline passed first
+        """
+        equity = move[4]
+        reply = prepared.best_move(opponent_rack)
+        if reply is None:
+            return equity
+        equity -= reply[4]
+        if self.plies >= 2:
+            if time.perf_counter() >= deadline:
+                return None
+            board = prepared.board
+            placed = board.apply_move(reply[0], reply[1], reply[2])
+            try:
+                leave = self._leave(move)
+                our_rack = leave + bag[:7 - len(leave)]
+                equity += make_solver(lexicon_tree, board, our_rack).best_score()
+            finally:
+                board.undo_move(placed)
+        return equity
+
+    def choose_move(self, game_state):
+        """
+        Choose the candidate move with the best average simulated equity.
+
+        Args:
+            game_state (dict): Dictionary containing:
+                - legal_moves (list): List of legal moves
+                - board (Board): Current state of the game board
+                - tile_distribution (dict): Original distribution of tiles
+                - lexicon_tree: Game's lexicon tree
+
+        Returns:
+            int: Index of chosen move or 0 to end game
+        """
+        deadline = time.perf_counter() + self.time_budget
+        legal_moves = game_state['legal_moves']
+
+        # If no legal moves available, end turn
+        if not legal_moves:
+            return 0
+
+        board = game_state['board']
+        lexicon_tree = game_state.get('lexicon_tree')
+        candidates = heapq.nlargest(self.candidates, range(len(legal_moves)), key=lambda i: legal_moves[i][4])
+        unseen = self._unseen_tiles(game_state)
+
+        # Every round solves each candidate's position again with a new opponent rack, so
+        # the position after each candidate is played on its own board and prepared once.
+        prepared = []
+        for index in candidates:
+            word, pos, direction, _, _ = legal_moves[index]
+            candidate_board = board.copy()
+            candidate_board.apply_move(word, pos, direction)
+            prepared.append(PreparedBoard(lexicon_tree, candidate_board))
+
+        totals = [0] * len(candidates)
+        rounds = 0
+        while len(candidates) > 1 and unseen and time.perf_counter() < deadline:
+            # Every candidate is measured against the same sample, which keeps their comparison fair.
+            self.rng.shuffle(unseen)
+            opponent_rack, bag = unseen[:7], unseen[7:]
+            equities = []
+            for index, candidate in zip(candidates, prepared):
+                if time.perf_counter() >= deadline:
+                    break
+                equity = self._simulate(candidate, legal_moves[index], opponent_rack, bag, lexicon_tree, deadline)
+                if equity is None:
+                    break
+                equities.append(equity)
+            else:
+                # Only completed rounds count, so every candidate has the same number of samples.
+                totals = [total + equity for total, equity in zip(totals, equities)]
+                rounds += 1
+
+        if rounds:
+            best = max(range(len(candidates)),
+                       key=lambda i: (totals[i], legal_moves[candidates[i]][4], -candidates[i]))
+        else:
+            best = 0
+        best_move_index = candidates[best] + 1
+
+        if self.verbose:
+            chosen_move = legal_moves[best_move_index - 1]
+            print(f"{self.name} chooses to play '{chosen_move[0]}' at {chosen_move[1]} "
+                  f"({chosen_move[2]}) for {chosen_move[4]} points")
+            if rounds:
+                print(f"Average equity {totals[best] / rounds:.1f} over {rounds} simulated replies")
+
+        return best_move_index
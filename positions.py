@@ -0,0 +1,274 @@
+"""
+Saving and loading game states and positions.
+
+Two formats:
+
+- A GCG-style text move log, one line per move:
+
+      #player1 Greedy_1 Greedy 1
+      >Greedy_1: AEINRST 8D RETAINS +74 74
+
+  Coordinates are row number then column letter for an across move ("8D" is
+  row 8, column D) and column letter then row number for a down move. As in
+  GCG, tiles are upper case, blanks are lower case, and a '.' in a word stands
+  for a tile already on the board. Replaying a log gives every position of the
+  game with the rack that was to move.
+
+- A binary snapshot file holding any number of Positions (board, racks, bag,
+  scores and player to move). The board's tile bytes are stored as they are
+  held in memory, so loading a position is a few slices of one buffer; a file
+  of thousands of positions loads in well under a second.
+
+Usage:
+    python positions.py corpus.pos --boards 5000 --moves 10
+"""
+import argparse
+import struct
+
+from board import BLANK, Board
+
+MAGIC = b'SPOS'
+VERSION = 1
+# magic, version, position count
+HEADER = struct.Struct('<4sII')
+# board size, player to move, number of racks, bag length
+RECORD = struct.Struct('<BBBB')
+RACK = struct.Struct('<hB')  # score, rack length
+
+COLUMNS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class Position:
+    """A game state: the board, every player's rack and score, the bag in draw order, and who is to move."""
+
+    def __init__(self, board, racks, bag=(), scores=None, to_move=0):
+        self.board = board
+        self.racks = [list(rack) for rack in racks]
+        self.bag = list(bag)
+        self.scores = list(scores) if scores is not None else [0] * len(self.racks)
+        self.to_move = to_move
+
+    @property
+    def rack(self):
+        """Rack of the player to move."""
+        return self.racks[self.to_move]
+
+    @classmethod
+    def from_game(cls, game):
+        """Snapshot of a ScrabbleGame between turns."""
+        return cls(game.board.copy(), [player.rack for player in game.players], game.bag.tiles,
+                   [player.score for player in game.players], game.current_player_idx)
+
+    def make_bag(self):
+        """ScrabbleBag that draws this position's bag tiles in order."""
+        from game import ScrabbleBag
+        return ScrabbleBag.from_tiles(self.bag)
+
+    def __eq__(self, other):
+        return (isinstance(other, Position) and self.board.tile_bytes() == other.board.tile_bytes()
+                and (self.racks, self.bag, self.scores, self.to_move)
+                == (other.racks, other.bag, other.scores, other.to_move))
+
+
+def pack_position(position):
+    board = position.board
+    parts = [RECORD.pack(board.size, position.to_move, len(position.racks), len(position.bag))]
+    for rack, score in zip(position.racks, position.scores):
+        parts.append(RACK.pack(score, len(rack)))
+        parts.append(''.join(rack).encode('ascii'))
+    parts.append(board.tile_bytes())
+    parts.append(''.join(position.bag).encode('ascii'))
+    return b''.join(parts)
+
+
+def write_positions(file_name, positions):
+    """
+    Write Positions to a binary snapshot file.
+
+    Returns:
+        int: Number of positions written
+    """
+    records = [pack_position(position) for position in positions]
+    with open(file_name, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        file.write(b''.join(records))
+    return len(records)
+
+
+def read_positions(file_name):
+    """
+    Returns:
+        list: The Positions in a snapshot file written by write_positions, in order
+    """
+    with open(file_name, 'rb') as file:
+        data = file.read()
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{file_name} is not a version {VERSION} position file")
+    positions = []
+    offset = HEADER.size
+    for _ in range(count):
+        size, to_move, rack_count, bag_length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        racks = []
+        scores = []
+        for _ in range(rack_count):
+            score, rack_length = RACK.unpack_from(data, offset)
+            offset += RACK.size
+            racks.append(list(data[offset:offset + rack_length].decode('ascii')))
+            scores.append(score)
+            offset += rack_length
+        board = Board.from_tile_bytes(data[offset:offset + size * size], size)
+        offset += size * size
+        bag = list(data[offset:offset + bag_length].decode('ascii'))
+        offset += bag_length
+        position = Position.__new__(Position)
+        position.board, position.racks, position.bag, position.scores, position.to_move = \
+            board, racks, bag, scores, to_move
+        positions.append(position)
+    return positions
+
+
+def format_coordinate(pos, direction):
+    row, col = pos
+    if direction == 'across':
+        return f"{row + 1}{COLUMNS[col]}"
+    return f"{COLUMNS[col]}{row + 1}"
+
+
+def parse_coordinate(text):
+    """
+    Returns:
+        tuple: (pos, direction) of a coordinate such as "8D" (across) or "D8" (down)
+    """
+    if text[0].isdigit():
+        return (int(text[:-1]) - 1, COLUMNS.index(text[-1])), 'across'
+    return (int(text[1:]) - 1, COLUMNS.index(text[0])), 'down'
+
+
+def _nickname(name):
+    return name.replace(' ', '_')
+
+
+def format_game_log(player_names, move_log):
+    """
+    GCG-style text of a game.
+
+    Args:
+        player_names (list): Names of the players, in seat order
+        move_log (list): ScrabbleGame.move_log
+
+    Returns:
+        str: One '#player' line per player, then one line per move or end-of-game rack adjustment
+    """
+    lines = [f"#player{i + 1} {_nickname(name)} {name}" for i, name in enumerate(player_names)]
+    totals = {name: 0 for name in player_names}
+    for move in move_log:
+        totals[move['player']] += move['score']
+        if 'end_rack' in move:
+            # GCG's "(tiles) +N" for going out (with an empty rack) and "rack (rack) -N" for tiles left
+            prefix = f"{move['rack'].swapcase()} " if move['rack'] else ''
+            lines.append(f">{_nickname(move['player'])}: {prefix}({move['end_rack'].swapcase()}) "
+                         f"{move['score']:+} {totals[move['player']]}")
+            continue
+        # Our tiles are lower case with upper-case blanks; GCG's are the other way round.
+        lines.append(f">{_nickname(move['player'])}: {move['rack'].swapcase()} "
+                     f"{format_coordinate(tuple(move['pos']), move['direction'])} {move['word'].swapcase()} "
+                     f"+{move['score']} {totals[move['player']]}")
+    return '\n'.join(lines) + '\n'
+
+
+def parse_game_log(text):
+    """
+    Read a GCG-style game.
+
+    Passes, exchanges and end-of-game rack adjustments are skipped. Played-through
+    tiles are left as '.' in the words; replay_game_log fills them in.
+
+    Returns:
+        tuple: (player names, moves) where each move is (player, rack, word, pos, direction, score)
+    """
+    names = []
+    nicknames = dict()
+    moves = []
+    for line in text.splitlines():
+        if line.startswith('#player'):
+            _, nickname, *full_name = line.split()
+            name = ' '.join(full_name) or nickname
+            nicknames[nickname] = name
+            names.append(name)
+        elif line.startswith('>'):
+            nickname, _, fields = line[1:].partition(':')
+            fields = fields.split()
+            if len(fields) < 5 or fields[1][0] in '-(':
+                continue
+            rack, coordinate, word, score = fields[0], fields[1], fields[2], int(fields[3])
+            pos, direction = parse_coordinate(coordinate)
+            moves.append((nicknames.get(nickname, nickname), list(rack.swapcase()), word.swapcase(),
+                          pos, direction, score))
+    return names, moves
+
+
+def replay_game_log(moves, size=15):
+    """
+    Play a parsed game log on an empty board.
+
+    Yields:
+        tuple: (board, rack, move) before each move, where move is the
+        (word, pos, direction, used_rack, score) tuple the solver would give it.
+        The board is a copy, so it can be kept.
+    """
+    board = Board(size)
+    for _, rack, word, pos, direction, score in moves:
+        row, col = pos
+        letters = []
+        used_rack = []
+        for letter in word:
+            tile = board.get_tile((row, col))
+            if tile is None:
+                used_rack.append(BLANK if letter.isupper() else letter)
+                letters.append(letter)
+            else:
+                letters.append(tile)
+            if direction == 'across':
+                col += 1
+            else:
+                row += 1
+        word = ''.join(letters)
+        yield board.copy(), rack, (word, pos, direction, used_rack, score)
+        board.apply_move(word, pos, direction)
+
+
+def save_game_log(file_name, game):
+    with open(file_name, 'w') as file:
+        file.write(format_game_log([player.name for player in game.players], game.move_log))
+
+
+def load_game_log(file_name):
+    with open(file_name) as file:
+        return parse_game_log(file.read())
+
+
+def main():
+    from letter_tree import build_tree_from_file
+    from solver import random_board
+
+    parser = argparse.ArgumentParser(description="Write a snapshot file of seeded random positions")
+    parser.add_argument('output')
+    parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    parser.add_argument('--boards', type=int, default=1000)
+    parser.add_argument('--moves', type=int, default=10, help="moves played on each random board")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first board; board i uses seed + i")
+    args = parser.parse_args()
+
+    lexicon = build_tree_from_file(args.lexicon)
+    positions = []
+    for seed in range(args.seed, args.seed + args.boards):
+        board, rack = random_board(lexicon, seed, args.moves)
+        positions.append(Position(board, [rack]))
+    count = write_positions(args.output, positions)
+    print(f"Wrote {count} positions to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
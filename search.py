@@ -0,0 +1,263 @@
+"""
+Depth-limited expectimax search over our move, the opponent's reply and our
+follow-up, with the opponent's rack (and our draw) sampled from the unseen tiles.
+
+Depth is counted in plies. The value of one of our candidate moves is
+
+    depth 1: its score
+    depth 2: its score minus the average over sampled opponent racks of the
+             opponent's best reply score
+    depth 3: as depth 2, but each reply is worth its score minus our best
+             follow-up score (from our leave plus a draw from the sample's bag),
+             and the opponent picks the reply that is worth the most to them
+
+Candidates are the top-scoring moves; at each depth they are searched in the
+order the previous depth ranked them, so good moves are found early. Bounds
+skip work without changing the result:
+
+- At depth 2 the opponent's best reply to a candidate is at least the score of
+  any of their best replies on the current board (solved once per sampled rack)
+  that the candidate leaves untouched, and at least zero. Once a candidate's
+  score minus the replies averaged so far and those lower bounds for the racks
+  not yet searched cannot beat the best candidate, it is dropped (Star2-style
+  pruning at the chance node, with the current-board replies as probes).
+- At depth 3 our follow-up scores at least zero, so a reply is worth at most
+  its score to the opponent: replies are tried best score first, and stop as
+  soon as one scores no more than the best value already found.
+
+search() deepens one ply at a time until the time budget runs out and returns
+the choice of the deepest completed depth.
+"""
+import heapq
+import random
+import time
+
+from solver import PreparedBoard, make_solver
+
+
+def move_footprint(board, move):
+    """
+    The squares of a move's main word and cross-words on `board`, plus their
+    orthogonal neighbours. A later move that places no tile on any of them
+    leaves this move legal with the same score.
+    """
+    word, (row, col), direction, _, _ = move
+    step_row, step_col = (0, 1) if direction == 'across' else (1, 0)
+    squares = set()
+    for offset in range(len(word)):
+        pos = (row + step_row * offset, col + step_col * offset)
+        squares.add(pos)
+        if board.is_empty(pos):
+            # The tiles of the cross-word through a newly placed tile
+            for sign in (1, -1):
+                cross = (pos[0] + step_col * sign, pos[1] + step_row * sign)
+                while board.is_filled(cross):
+                    squares.add(cross)
+                    cross = (cross[0] + step_col * sign, cross[1] + step_row * sign)
+    footprint = set(squares)
+    for square_row, square_col in squares:
+        footprint.update(((square_row - 1, square_col), (square_row + 1, square_col),
+                          (square_row, square_col - 1), (square_row, square_col + 1)))
+    return footprint
+
+
+class SearchResult:
+    """Outcome of ExpectimaxSearch.search."""
+
+    def __init__(self, index, value, depth, solves, pruned, seconds):
+        self.index = index  # index into the legal moves
+        self.value = value
+        self.depth = depth  # deepest completed depth
+        self.solves = solves  # move generations run
+        self.pruned = pruned  # candidate evaluations cut short by the depth-2 bound
+        self.seconds = seconds
+
+
+class _Timeout(Exception):
+    pass
+
+
+class ExpectimaxSearch:
+    """
+    Expectimax search for one turn.
+
+    Usage:
+        search = ExpectimaxSearch(lexicon, board, rack, unseen_tiles)
+        result = search.search(legal_moves, time_budget=2.0)
+        move = legal_moves[result.index]
+    """
+
+    # Opponent replies on the current board kept per sampled rack as pruning probes.
+    PROBE_WIDTH = 5
+
+    def __init__(self, lexicon, board, rack, unseen, candidates=10, samples=8, reply_width=5, rng=random):
+        """
+        Args:
+            lexicon: Game's lexicon
+            board (Board): Current board (left unchanged)
+            rack (list): Our rack
+            unseen (list): Tiles in the bag or on the opponent's rack
+            candidates (int): Number of top-scoring moves to search
+            samples (int): Opponent racks sampled; all candidates are evaluated against the same ones
+            reply_width (int): Opponent replies considered at depth 3, highest scores first
+            rng: Random source for the samples
+        """
+        self.lexicon = lexicon
+        self.board = board
+        self.rack = rack
+        self.candidate_count = candidates
+        self.reply_width = reply_width
+        self.prune = True
+        unseen = list(unseen)
+        if len(unseen) <= 7:
+            # The bag is empty: the opponent holds exactly the unseen tiles.
+            self.samples = [(unseen, [])]
+        else:
+            self.samples = []
+            for _ in range(samples):
+                rng.shuffle(unseen)
+                self.samples.append((unseen[:7], unseen[7:]))
+        self._sample_order = list(range(len(self.samples)))
+        # Per sample: (score, footprint) of the opponent's best replies on the current board
+        self._probes = None
+        self.solves = 0
+        self.pruned = 0
+        self._deadline = None
+
+    def _check_time(self):
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise _Timeout()
+
+    def _leave(self, move):
+        leave = list(self.rack)
+        for tile in move[3]:
+            leave.remove(tile)
+        return leave
+
+    def _opponent_value(self, depth, prepared, move, sample_index):
+        """Value to the opponent of the position after `move` (prepared), for one sampled rack."""
+        self._check_time()
+        opponent_rack, bag = self.samples[sample_index]
+        if depth == 2:
+            self.solves += 1
+            return prepared.best_score(opponent_rack)
+
+        self.solves += 1
+        replies = prepared.solver(opponent_rack).top_moves(self.reply_width)
+        if not replies:
+            return 0
+        leave = self._leave(move)
+        our_rack = leave + bag[:7 - len(leave)]
+        board = prepared.board
+        best = None
+        for reply in replies:
+            # Our follow-up scores at least 0, so a reply is worth at most its score to the opponent.
+            if best is not None and reply[4] <= best:
+                break
+            self._check_time()
+            placed = board.apply_move(reply[0], reply[1], reply[2])
+            try:
+                self.solves += 1
+                value = reply[4] - make_solver(self.lexicon, board, our_rack).best_score()
+            finally:
+                board.undo_move(placed)
+            if best is None or value > best:
+                best = value
+        return best
+
+    def _probe_replies(self):
+        self._probes = []
+        for opponent_rack, _ in self.samples:
+            self._check_time()
+            self.solves += 1
+            replies = make_solver(self.lexicon, self.board, list(opponent_rack)).top_moves(self.PROBE_WIDTH)
+            self._probes.append([(reply[4], move_footprint(self.board, reply)) for reply in replies])
+
+    def _evaluate(self, depth, prepared, placed, move, best_value):
+        """
+        Expected value of `move` (which places tiles on the squares `placed`) at
+        `depth`, or None once it is certain to be below `best_value`.
+        """
+        count = len(self.samples)
+        prune = self.prune and depth == 2 and best_value is not None
+        if prune:
+            # The best probe reply that `move` leaves in place for each rack, or 0
+            lower_bounds = {sample_index: max((score for score, footprint in self._probes[sample_index]
+                                               if footprint.isdisjoint(placed)), default=0)
+                            for sample_index in self._sample_order}
+            remaining = sum(lower_bounds.values())
+        total = 0
+        values = dict()
+        for sample_index in self._sample_order:
+            # Strictly below, so that pruning never changes which move is chosen.
+            if prune and move[4] - (total + remaining) / count < best_value:
+                self.pruned += 1
+                return None
+            value = values[sample_index] = self._opponent_value(depth, prepared, move, sample_index)
+            total += value
+            if prune:
+                remaining -= lower_bounds[sample_index]
+        if best_value is None:
+            # Racks that give the first (most promising) candidate big replies probably do for the
+            # others too; trying them first lets the partial sums reach the pruning bound sooner.
+            self._sample_order.sort(key=lambda sample_index: -values[sample_index])
+        return move[4] - total / count
+
+    def _search_depth(self, depth, order, prepared, placed, legal_moves, candidates):
+        """
+        Returns:
+            list: Value of each candidate at `depth` (None for pruned ones)
+        """
+        values = [None] * len(candidates)
+        best_value = None
+        for position in order:
+            value = self._evaluate(depth, prepared[position], placed[position], legal_moves[candidates[position]],
+                                   best_value)
+            values[position] = value
+            if value is not None and (best_value is None or value > best_value):
+                best_value = value
+        return values
+
+    def search(self, legal_moves, time_budget=None, max_depth=3):
+        """
+        Iterative deepening from depth 1 up to `max_depth` or until `time_budget` seconds have passed.
+
+        Returns:
+            SearchResult: The best candidate of the deepest completed depth
+        """
+        start = time.perf_counter()
+        self._deadline = None if time_budget is None else start + time_budget
+        candidates = heapq.nlargest(self.candidate_count, range(len(legal_moves)), key=lambda i: legal_moves[i][4])
+        # Depth 1: the highest-scoring move.
+        best = 0
+        best_value = legal_moves[candidates[0]][4]
+        completed = 1
+        # Search order for the next depth: best candidate first.
+        order = list(range(len(candidates)))
+
+        if len(candidates) > 1 and max_depth >= 2:
+            prepared = []
+            placed = []
+            for index in candidates:
+                word, pos, direction, _, _ = legal_moves[index]
+                candidate_board = self.board.copy()
+                placed.append(set(candidate_board.apply_move(word, pos, direction)))
+                prepared.append(PreparedBoard(self.lexicon, candidate_board))
+            for depth in range(2, max_depth + 1):
+                try:
+                    if self.prune and self._probes is None:
+                        self._probe_replies()
+                    values = self._search_depth(depth, order, prepared, placed, legal_moves, candidates)
+                except _Timeout:
+                    break
+                completed = depth
+                best = max((position for position in order if values[position] is not None),
+                           key=lambda position: (values[position], legal_moves[candidates[position]][4],
+                                                 -candidates[position]))
+                best_value = values[best]
+                # Pruned candidates keep their previous place behind the evaluated ones.
+                order = sorted(order, key=lambda position: values[position] is None)
+                order = [best] + [position for position in order if position != best]
+
+        return SearchResult(candidates[best], best_value, completed, self.solves, self.pruned,
+                            time.perf_counter() - start)
@@ -0,0 +1,136 @@
+"""
+Headless bot-vs-bot simulation.
+
+Plays seeded games between AI players without printing or rendering anything and
+writes one JSON object per game (players, final scores, winner, every move with
+the time taken to choose it), in game order.
+
+Usage:
+    python simulate.py greedy adversarial --games 100 --workers 4 --output results.jsonl
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from adversarial_player import AdversarialAIPlayer
+from equity_player import EquityAIPlayer
+from expectimax_player import ExpectimaxPlayer
+from game import GreedyAIPlayer, ScrabbleGame
+from letter_tree import load_lexicon
+from montecarlo_player import MonteCarloPlayer
+
+PLAYER_TYPES = {
+    'greedy': GreedyAIPlayer,
+    'adversarial': AdversarialAIPlayer,
+    'equity': EquityAIPlayer,
+    'expectimax': ExpectimaxPlayer,
+    'montecarlo': MonteCarloPlayer,
+}
+
+# Lexicon of a worker process, loaded once by _init_worker and shared by all of its games.
+_worker_lexicon = None
+
+
+def _init_worker(lexicon_path):
+    global _worker_lexicon
+    _worker_lexicon = load_lexicon(lexicon_path)
+
+
+def play_game(player_classes, lexicon, seed, game_index=0):
+    """
+    Play one silent game between two AI players.
+
+    Every random choice (the bag, the starting player, the players' own draws)
+    comes from `seed`, so a game replays identically wherever it runs (unless a
+    player's choices depend on a time budget, like MonteCarloPlayer's).
+
+    Args:
+        player_classes: Two Player subclasses that can be built from a name alone
+        lexicon: Loaded lexicon, shared between games
+        seed (int): Seed for the game
+        game_index (int): Number reported with the result
+
+    Returns:
+        dict: JSON-serializable game result
+    """
+    random.seed(seed)
+    players = [player_class(f"{player_class.__name__} {i + 1}") for i, player_class in enumerate(player_classes)]
+    for player in players:
+        player.verbose = False
+    game = ScrabbleGame(players[0], players[1], lexicon_tree=lexicon, verbose=False)
+    first_player = game.players[game.current_player_idx].name
+
+    start = time.perf_counter()
+    try:
+        game.start_game()
+    finally:
+        for player in players:
+            if hasattr(player, 'close'):
+                player.close()
+    elapsed = time.perf_counter() - start
+
+    top_score = max(player.score for player in players)
+    winners = [player.name for player in players if player.score == top_score]
+    return {
+        'game': game_index,
+        'seed': seed,
+        'players': [{'name': player.name, 'type': type(player).__name__, 'score': player.score}
+                    for player in players],
+        'first_player': first_player,
+        'winner': winners[0] if len(winners) == 1 else None,
+        'moves': game.move_log,
+        'seconds': elapsed,
+    }
+
+
+def _play_game_in_worker(player_classes, seed, game_index):
+    return play_game(player_classes, _worker_lexicon, seed, game_index)
+
+
+def simulate(player_classes, lexicon_path, games, seed=0, workers=1):
+    """
+    Play `games` games, game i with seed `seed + i`, and yield their results in order.
+
+    Args:
+        player_classes: Two Player subclasses
+        lexicon_path (str): Lexicon to load once per process
+        games (int): Number of games
+        seed (int): Seed of the first game
+        workers (int): Processes to spread the games over; 1 plays them in this process
+    """
+    seeds = [seed + i for i in range(games)]
+    if workers <= 1:
+        lexicon = load_lexicon(lexicon_path)
+        for game_index, game_seed in enumerate(seeds):
+            yield play_game(player_classes, lexicon, game_seed, game_index)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(lexicon_path,)) as pool:
+        yield from pool.map(_play_game_in_worker, [player_classes] * games, seeds, range(games))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play seeded bot-vs-bot Scrabble games headlessly")
+    parser.add_argument('players', nargs=2, choices=sorted(PLAYER_TYPES))
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game; game i uses seed + i")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--lexicon', default='lexicon/lexicon_full.dawg')
+    parser.add_argument('--output', help="JSON lines file to write (default: standard output)")
+    args = parser.parse_args()
+
+    player_classes = [PLAYER_TYPES[name] for name in args.players]
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for result in simulate(player_classes, args.lexicon, args.games, args.seed, args.workers):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,14 @@
+import heapq
+import random
+from collections import OrderedDict
+from itertools import permutations
+
 from letter_tree import build_tree_from_file
-from board import sample_board
+from board import BLANK, Board, sample_board
+from cross_check import ALPHABET, BIT_LETTERS, LETTER_BITS, LETTER_INDEX, CrossCheckCache
+
+LETTER_SCORES = Board.LETTER_SCORES
+
 
 class SolveState:
     def __init__(self, dictionary, board, rack):
@@ -7,8 +16,35 @@ class SolveState:
         self.board = board
         self.rack = rack
         self.reference_rack = rack.copy()
+        # The rack as per-letter counts plus a mask of the letters still available,
+        # so the generator tests `rack_mask & cross_check & bit` instead of scanning lists.
+        self.rack_counts = [0] * len(ALPHABET)
+        self.rack_mask = 0
+        # Blanks are kept apart: they are tried as whatever letters the lexicon allows next.
+        self.blank_count = 0
+        for letter in rack:
+            if letter == BLANK:
+                self.blank_count += 1
+            else:
+                self.rack_counts[LETTER_INDEX[letter]] += 1
+                self.rack_mask |= LETTER_BITS[letter]
+        self.reference_blanks = self.blank_count
         self.cross_check_results = None
+        self.cross_word_results = None
+        self.letter_multipliers = None
+        self.word_multipliers = None
+        self.left_premiums = None
+        self.left_length = 0
         self.direction = None
+        self.anchor_set = None
+        # Rack-independent set-up of each anchor (see anchor_context), filled in as anchors are solved
+        self.anchor_contexts = None
+        # Set by PreparedBoard.solver: the board's tables, shared by every rack solved on it
+        self.prepared = None
+        # Set by top_moves / best_move: moves scoring no more than min_score are not
+        # recorded, and found moves go to move_sink instead of found_moves.
+        self.min_score = None
+        self.move_sink = None
         self.found_moves = []
 
     def before(self, pos):
@@ -39,124 +75,644 @@ class SolveState:
         else:
             return row, col + 1
 
-    def legal_move(self, word, last_pos):
+    def legal_move(self, word, last_pos, main_score, word_multiplier, cross_score, tiles_placed):
+        # The left part only settles on squares once its length is known, so its premiums
+        # are added here rather than while it is built. Left-part squares are not anchors
+        # and so have no cross-words.
+        distance = self.left_length
+        for letter in word[:self.left_length]:
+            letter_multiplier, square_word_multiplier = self.left_premiums[distance]
+            main_score += LETTER_SCORES[letter] * letter_multiplier
+            word_multiplier *= square_word_multiplier
+            distance -= 1
+        score = self.move_score(main_score, word_multiplier, cross_score, tiles_placed)
         play_pos = last_pos
         word_idx = len(word) - 1
         while word_idx >= 0:
             play_pos = self.before(play_pos)
             word_idx -= 1
         start_pos = self.after(play_pos)
-        score = self.board.calculate_score(word, start_pos, self.direction, self.rack.copy())
-        # remove self.rack.copy() from self.reference_rack
-        used_rack = self.reference_rack.copy()
-        for letter in self.rack:
-            used_rack.remove(letter)
-        self.found_moves.append((word, self.after(play_pos), self.direction, used_rack, score))
+        self.record_move(word, start_pos, score)
 
-    def cross_check(self):
-        result = dict()
-        for pos in self.board.all_positions():
-            if self.board.is_filled(pos):
+    def record_move(self, word, start_pos, score):
+        if self.blank_count != self.reference_blanks:
+            word, score = self.best_blank_squares(word, start_pos, score)
+        if self.min_score is not None and score <= self.min_score:
+            return
+        # Split self.reference_rack into the tiles still counted in the rack and the tiles used.
+        unused_counts = self.rack_counts.copy()
+        unused_blanks = self.blank_count
+        used_rack = []
+        for letter in self.reference_rack:
+            if letter == BLANK:
+                if unused_blanks:
+                    unused_blanks -= 1
+                else:
+                    used_rack.append(letter)
                 continue
-            letters_before = ""
-            scan_pos = pos
-            while self.board.is_filled(self.before_cross(scan_pos)):
-                scan_pos = self.before_cross(scan_pos)
-                letters_before = self.board.get_tile(scan_pos) + letters_before
-            letters_after = ""
-            scan_pos = pos
-            while self.board.is_filled(self.after_cross(scan_pos)):
-                scan_pos = self.after_cross(scan_pos)
-                letters_after = letters_after + self.board.get_tile(scan_pos)
-            if len(letters_before) == 0 and len(letters_after) == 0:
-                legal_here = list('abcdefghijklmnopqrstuvwxyz')
+            index = LETTER_INDEX[letter]
+            if unused_counts[index]:
+                unused_counts[index] -= 1
             else:
-                legal_here = []
-                for letter in 'abcdefghijklmnopqrstuvwxyz':
-                    word_formed = letters_before + letter + letters_after
-                    if self.dictionary.is_word(word_formed):
-                        legal_here.append(letter)
-            result[pos] = legal_here
-        return result
+                used_rack.append(letter)
+        move = (word, start_pos, self.direction, used_rack, score)
+        if self.move_sink is not None:
+            self.move_sink(move)
+        else:
+            self.found_moves.append(move)
+
+    def best_blank_squares(self, word, start_pos, score):
+        """
+        A blank is only played as a letter once the rack has none of that letter
+        left (see before_part), so when a move uses both a tile and a blank for
+        the same letter, the tile is on whichever square was reached first. Put
+        the blanks on the squares where the letter counts least instead.
+
+        Returns:
+            tuple: (word, score) with the blanks moved
+        """
+        if not any(letter.isupper() and letter.lower() in word for letter in word):
+            return word, score
+        placed = []
+        pos = start_pos
+        for word_idx, letter in enumerate(word):
+            if self.board.is_empty(pos):
+                placed.append((word_idx, pos))
+            pos = self.after(pos)
+        shared = {word[word_idx] for word_idx, _ in placed if word[word_idx].isupper()} & \
+            {word[word_idx].upper() for word_idx, _ in placed if word[word_idx].islower()}
+        if not shared:
+            return word, score
+        word_multiplier = 1
+        for _, (row, col) in placed:
+            word_multiplier *= self.word_multipliers[row][col]
+
+        def weight(pos):
+            # What one point of the letter on `pos` adds to the main word and its cross-word
+            row, col = pos
+            cross_multiplier = self.word_multipliers[row][col] if pos in self.cross_word_results else 0
+            return self.letter_multipliers[row][col] * (word_multiplier + cross_multiplier)
+
+        letters = list(word)
+        for blank_letter in shared:
+            squares = sorted((weight(pos), word_idx) for word_idx, pos in placed
+                             if word[word_idx].upper() == blank_letter)
+            blanks = sum(word[word_idx].isupper() for _, word_idx in squares)
+            score += LETTER_SCORES[blank_letter.lower()] * (
+                sum(square_weight for square_weight, word_idx in squares if word[word_idx].isupper()) -
+                sum(square_weight for square_weight, _ in squares[:blanks]))
+            for count, (_, word_idx) in enumerate(squares):
+                letters[word_idx] = blank_letter if count < blanks else blank_letter.lower()
+        return ''.join(letters), score
+
+    def move_score(self, main_score, word_multiplier, cross_score, tiles_placed):
+        """Final score of a move from the running totals kept while it was generated."""
+        score = main_score * word_multiplier + cross_score
+        if tiles_placed == 7:
+            score += Board.BINGO_BONUS
+        return score
+
+    def cross_check(self):
+        # Maintained incrementally on the board across turns; see cross_check.py.
+        return CrossCheckCache.for_board(self.board, self.dictionary).cross_checks(self.direction)
+
+    def cross_word_scores(self):
+        return CrossCheckCache.for_board(self.board, self.dictionary).cross_word_scores(self.direction)
 
     def find_anchors(self):
-        anchors = []
-        for pos in self.board.all_positions():
-            empty = self.board.is_empty(pos)
-            neighbor_filled = self.board.is_filled(self.before(pos)) or \
-                              self.board.is_filled(self.after(pos)) or \
-                              self.board.is_filled(self.before_cross(pos)) or \
-                              self.board.is_filled(self.after_cross(pos))
-            if empty and neighbor_filled:
-                anchors.append(pos)
-        return anchors
+        return CrossCheckCache.for_board(self.board, self.dictionary).anchor_list()
 
     def before_part(self, partial_word, current_node, anchor_pos, limit):
-        self.extend_after(partial_word, current_node, anchor_pos, False)
+        self.left_length = len(partial_word)
+        self.extend_after(partial_word, current_node, anchor_pos, False, 0, 1, 0, len(partial_word))
         if limit > 0:
-            for next_letter in current_node.children.keys():
-                if next_letter in self.rack:
-                    self.rack.remove(next_letter)
+            rack_counts = self.rack_counts
+            available = self.rack_mask
+            while available:
+                bit = available & -available
+                available ^= bit
+                next_letter = BIT_LETTERS[bit]
+                child = current_node.children.get(next_letter)
+                if child is not None:
+                    index = LETTER_INDEX[next_letter]
+                    rack_counts[index] -= 1
+                    if not rack_counts[index]:
+                        self.rack_mask ^= bit
                     self.before_part(
                         partial_word + next_letter,
-                        current_node.children[next_letter],
+                        child,
                         anchor_pos,
                         limit - 1
                     )
-                    self.rack.append(next_letter)
+                    if not rack_counts[index]:
+                        self.rack_mask ^= bit
+                    rack_counts[index] += 1
+            if self.blank_count:
+                # A blank follows the lexicon's edges instead of trying all 26 letters. It is not played
+                # as a letter still on the rack: the tile would score more there and keep the blank.
+                self.blank_count -= 1
+                for next_letter, child in current_node.children.items():
+                    if not self.rack_mask & LETTER_BITS[next_letter]:
+                        self.before_part(partial_word + next_letter.upper(), child, anchor_pos, limit - 1)
+                self.blank_count += 1
 
-    def extend_after(self, partial_word, current_node, next_pos, anchor_filled):
+    def extend_after(self, partial_word, current_node, next_pos, anchor_filled,
+                     main_score, word_multiplier, cross_score, tiles_placed):
         if not self.board.is_filled(next_pos) and current_node.is_word and anchor_filled:
-            self.legal_move(partial_word, self.before(next_pos))
+            self.legal_move(partial_word, self.before(next_pos),
+                            main_score, word_multiplier, cross_score, tiles_placed)
         if self.board.in_bounds(next_pos):
             if self.board.is_empty(next_pos):
-                for next_letter in current_node.children.keys():
-                    if next_letter in self.rack and next_letter in self.cross_check_results[next_pos]:
-                        self.rack.remove(next_letter)
+                row, col = next_pos
+                letter_multiplier = self.letter_multipliers[row][col]
+                square_word_multiplier = self.word_multipliers[row][col]
+                cross_base = self.cross_word_results.get(next_pos)
+                rack_counts = self.rack_counts
+                allowed = self.rack_mask & self.cross_check_results[next_pos]
+                while allowed:
+                    bit = allowed & -allowed
+                    allowed ^= bit
+                    next_letter = BIT_LETTERS[bit]
+                    child = current_node.children.get(next_letter)
+                    if child is not None:
+                        index = LETTER_INDEX[next_letter]
+                        rack_counts[index] -= 1
+                        if not rack_counts[index]:
+                            self.rack_mask ^= bit
+                        letter_score = LETTER_SCORES[next_letter] * letter_multiplier
                         self.extend_after(
                             partial_word + next_letter,
-                            current_node.children[next_letter],
+                            child,
                             self.after(next_pos),
-                            True
+                            True,
+                            main_score + letter_score,
+                            word_multiplier * square_word_multiplier,
+                            cross_score if cross_base is None else
+                            cross_score + (cross_base + letter_score) * square_word_multiplier,
+                            tiles_placed + 1
                         )
-                        self.rack.append(next_letter)
+                        if not rack_counts[index]:
+                            self.rack_mask ^= bit
+                        rack_counts[index] += 1
+                if self.blank_count:
+                    # Not as a letter still on the rack (see before_part)
+                    blank_allowed = self.cross_check_results[next_pos] & ~self.rack_mask
+                    self.blank_count -= 1
+                    for next_letter, child in current_node.children.items():
+                        if blank_allowed & LETTER_BITS[next_letter]:
+                            self.extend_after(
+                                partial_word + next_letter.upper(),
+                                child,
+                                self.after(next_pos),
+                                True,
+                                main_score,
+                                word_multiplier * square_word_multiplier,
+                                cross_score if cross_base is None else
+                                cross_score + cross_base * square_word_multiplier,
+                                tiles_placed + 1
+                            )
+                    self.blank_count += 1
             else:
                 existing_letter = self.board.get_tile(next_pos)
-                if existing_letter in current_node.children.keys():
+                # Blanks on the board are upper case; the lexicon only knows lower case.
+                child = current_node.children.get(existing_letter.lower())
+                if child is not None:
                     self.extend_after(
                         partial_word + existing_letter,
-                        current_node.children[existing_letter],
+                        child,
                         self.after(next_pos),
-                        True
+                        True,
+                        main_score + LETTER_SCORES[existing_letter],
+                        word_multiplier,
+                        cross_score,
+                        tiles_placed
                     )
 
-    def find_all_options(self):
+    def start_direction(self, direction):
+        """Set up the board-derived tables for one direction and return its anchors."""
+        self.direction = direction
+        if self.prepared is not None:
+            anchors, self.anchor_set, self.cross_check_results, self.cross_word_results, self.anchor_contexts = \
+                self.prepared.direction_tables(direction)
+            return anchors
+        anchors = self.find_anchors()
+        self.anchor_set = set(anchors)
+        self.cross_check_results = self.cross_check()
+        self.cross_word_results = self.cross_word_scores()
+        self.anchor_contexts = dict()
+        return anchors
+
+    def anchor_context(self, anchor_pos):
+        """
+        The part of solving an anchor that does not depend on the rack.
+
+        Returns:
+            tuple: (partial_word, node, score, limit, left_premiums). When tiles
+            precede the anchor, partial_word is them, node is their lexicon node
+            (None if they start no word) and score their letter score; otherwise
+            limit is how many rack tiles a left part may use and left_premiums
+            the premiums of its squares, indexed by distance from the anchor.
+        """
+        if self.board.is_filled(self.before(anchor_pos)):
+            scan_pos = self.before(anchor_pos)
+            partial_word = self.board.get_tile(scan_pos)
+            while self.board.is_filled(self.before(scan_pos)):
+                scan_pos = self.before(scan_pos)
+                partial_word = self.board.get_tile(scan_pos) + partial_word
+            # Blanks on the board are upper case; the lexicon only knows lower case.
+            pw_node = self.dictionary.lookup(partial_word.lower())
+            return partial_word, pw_node, sum(LETTER_SCORES[letter] for letter in partial_word), None, None
+        limit = 0
+        scan_pos = anchor_pos
+        left_premiums = [None]
+        while self.board.is_empty(self.before(scan_pos)) and self.before(scan_pos) not in self.anchor_set:
+            limit = limit + 1
+            scan_pos = self.before(scan_pos)
+            row, col = scan_pos
+            left_premiums.append((self.board.letter_multipliers[row][col], self.board.word_multipliers[row][col]))
+        return None, None, 0, limit, left_premiums
+
+    def solve_anchor(self, anchor_pos):
+        """Generate the moves whose first anchor (in reading order along the line) is `anchor_pos`."""
+        context = self.anchor_contexts.get(anchor_pos)
+        if context is None:
+            context = self.anchor_contexts[anchor_pos] = self.anchor_context(anchor_pos)
+        partial_word, pw_node, score, limit, left_premiums = context
+        if limit is None:
+            if pw_node is not None:
+                self.left_length = 0
+                self.extend_after(partial_word, pw_node, anchor_pos, False, score, 1, 0, 0)
+        else:
+            self.left_premiums = left_premiums
+            self.before_part("", self.dictionary.root, anchor_pos, limit)
+
+    def generate(self):
+        """Run the generator, pausing after each anchor so callers can drain found_moves."""
+        self.letter_multipliers = self.board.letter_multipliers
+        self.word_multipliers = self.board.word_multipliers
         for direction in ['across', 'down']:
-            self.direction = direction
-            anchors = self.find_anchors()
-            self.cross_check_results = self.cross_check()
-            for anchor_pos in anchors:
-                if self.board.is_filled(self.before(anchor_pos)):
-                    scan_pos = self.before(anchor_pos)
-                    partial_word = self.board.get_tile(scan_pos)
-                    while self.board.is_filled(self.before(scan_pos)):
-                        scan_pos = self.before(scan_pos)
-                        partial_word = self.board.get_tile(scan_pos) + partial_word
-                    pw_node = self.dictionary.lookup(partial_word)
-                    if pw_node is not None:
-                        self.extend_after(
-                            partial_word,
-                            pw_node,
-                            anchor_pos,
-                            False
-                        )
-                else:
-                    limit = 0
-                    scan_pos = anchor_pos
-                    while self.board.is_empty(self.before(scan_pos)) and self.before(scan_pos) not in anchors:
-                        limit = limit + 1
-                        scan_pos = self.before(scan_pos)
-                    self.before_part("", self.dictionary.root, anchor_pos, limit)
+            for anchor_pos in self.start_direction(direction):
+                self.solve_anchor(anchor_pos)
+                yield
+
+    def find_all_options(self):
+        for _ in self.generate():
+            pass
+
+    def anchor_tasks(self):
+        """Every (direction, anchor) pair in the order find_all_options solves them."""
+        anchors = self.find_anchors()
+        return [(direction, anchor_pos) for direction in ['across', 'down'] for anchor_pos in anchors]
+
+    def solve_anchors(self, tasks):
+        """Generate the moves of the given (direction, anchor) pairs only, into found_moves."""
+        self.letter_multipliers = self.board.letter_multipliers
+        self.word_multipliers = self.board.word_multipliers
+        for direction, anchor_pos in tasks:
+            if direction != self.direction:
+                self.start_direction(direction)
+            self.solve_anchor(anchor_pos)
+
+    def iter_moves(self):
+        """
+        Yield legal moves as they are found instead of collecting them all in
+        found_moves; at most one anchor's moves are held at a time.
+        """
+        for _ in self.generate():
+            moves, self.found_moves = self.found_moves, []
+            yield from moves
+
+    def top_moves(self, k):
+        """
+        The k highest-scoring moves, best first.
+        Only a bounded heap of k moves is kept; once it is full, moves that
+        cannot beat its lowest score are not built at all.
+        """
+        heap = []
+        sequence = 0
+
+        def keep(move):
+            nonlocal sequence
+            sequence += 1
+            entry = (move[4], -sequence, move)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+            if len(heap) == k:
+                self.min_score = heap[0][0]
+
+        if k <= 0:
+            return []
+        self.min_score = -1
+        self.move_sink = keep
+        try:
+            self.find_all_options()
+        finally:
+            self.min_score = None
+            self.move_sink = None
+        return [move for _, _, move in sorted(heap, reverse=True)]
+
+    def best_move(self):
+        """The highest-scoring move, or None if there is no legal move."""
+        moves = self.top_moves(1)
+        return moves[0] if moves else None
+
+    def best_score(self):
+        """Score of the best move, or 0 if there is no legal move."""
+        move = self.best_move()
+        return move[4] if move is not None else 0
+
+
+def make_solver(dictionary, board, rack):
+    """
+    Create the move generator that matches the lexicon: lexicons that carry a
+    `solver_class` (e.g. gaddag.Gaddag) pick their own engine, everything else
+    uses the Appel-Jacobson SolveState.
+    """
+    solver_class = getattr(dictionary, 'solver_class', SolveState)
+    return solver_class(dictionary, board, rack)
+
+
+class PreparedBoard:
+    """
+    The rack-independent set-up of move generation on one position (anchors,
+    cross-check and cross-word tables, and each anchor's left-part limit or
+    existing prefix and its lexicon node), computed once and shared by solvers
+    for any number of racks.
+
+    The board is checked on every call and the set-up redone if its tiles have
+    changed, so a PreparedBoard can be kept while moves are tried on its board
+    and taken back.
+
+    Usage:
+        prepared = PreparedBoard(dictionary, board)
+        for rack in racks:
+            best = prepared.solver(rack).best_move()
+    """
+
+    def __init__(self, dictionary, board):
+        self.dictionary = dictionary
+        self.board = board
+        self._board_hash = None
+        self._cross_check_cache = None
+        self._tables = dict()
+
+    def solver(self, rack):
+        """A solver for `rack` on the board (as make_solver would create) that uses the shared set-up."""
+        cache = CrossCheckCache.for_board(self.board, self.dictionary)
+        # Brings the cache's tables, which the set-up shares, up to date with the board
+        cache.cross_checks('across')
+        if self._board_hash != self.board.zobrist_hash or self._cross_check_cache is not cache:
+            self._board_hash = self.board.zobrist_hash
+            self._cross_check_cache = cache
+            self._tables = dict()
+        solver = make_solver(self.dictionary, self.board, rack)
+        solver.prepared = self
+        return solver
+
+    def direction_tables(self, direction):
+        """
+        Returns:
+            tuple: (anchors, anchor set, cross-checks, cross-word scores, anchor contexts) for `direction`
+        """
+        tables = self._tables.get(direction)
+        if tables is None:
+            solver = make_solver(self.dictionary, self.board, [])
+            anchors = solver.start_direction(direction)
+            tables = (anchors, solver.anchor_set, solver.cross_check_results, solver.cross_word_results,
+                      solver.anchor_contexts)
+            self._tables[direction] = tables
+        return tables
+
+    def find_all_options(self, rack):
+        solver = self.solver(rack)
+        solver.find_all_options()
+        return solver.found_moves
+
+    def best_move(self, rack):
+        return self.solver(rack).best_move()
+
+    def best_score(self, rack):
+        return self.solver(rack).best_score()
+
+
+# Lexicon of a SolverPool worker process, set once by _init_worker.
+_worker_dictionary = None
+# The board of the worker's last task, kept so that its cross-check cache is reused
+# while the following tasks are for the same position.
+_worker_board = None
+
+
+def _init_worker(dictionary):
+    global _worker_dictionary
+    _worker_dictionary = dictionary
+
+
+def _solve_anchors_in_worker(board, rack, tasks):
+    global _worker_board
+    if _worker_board is None or _worker_board.size != board.size or _worker_board._tiles != board._tiles:
+        _worker_board = board
+    solver = make_solver(_worker_dictionary, _worker_board, rack)
+    solver.solve_anchors(tasks)
+    return solver.found_moves
+
+
+class SolverPool:
+    """
+    Generates moves with the anchors of a position split across worker processes.
+
+    The workers receive the lexicon once, when they start. Each position's
+    (direction, anchor) pairs are cut into contiguous chunks in the serial
+    order, so joining the chunks' moves gives exactly the list (and order) that
+    SolveState.find_all_options produces. Worth it for full-lexicon mid-game
+    boards on multi-core machines; small positions are faster in-process.
+
+    Usage:
+        with SolverPool(dictionary, workers=4) as pool:
+            moves = pool.find_all_options(board, rack)
+    """
+
+    # Tasks per worker process, so that anchors with many moves do not leave workers idle.
+    CHUNKS_PER_WORKER = 4
+
+    def __init__(self, dictionary, workers):
+        # Imported here because it is slow to import and only pools need it
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.dictionary = dictionary
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(dictionary,))
+
+    def find_all_options(self, board, rack):
+        """
+        Returns:
+            list: The moves SolveState.find_all_options would put in found_moves
+        """
+        tasks = make_solver(self.dictionary, board, rack).anchor_tasks()
+        if not tasks:
+            return []
+        chunk_count = min(len(tasks), self.workers * self.CHUNKS_PER_WORKER)
+        bounds = [len(tasks) * i // chunk_count for i in range(chunk_count + 1)]
+        futures = [self._pool.submit(_solve_anchors_in_worker, board, rack, tasks[start:end])
+                   for start, end in zip(bounds, bounds[1:])]
+        return [move for future in futures for move in future.result()]
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TranspositionCache:
+    """
+    Bounded LRU cache of solver results, for searches that reach the same
+    position with the same rack more than once (a one-tile play is found both
+    across and down; two moves played in either order give the same board).
+
+    Entries are keyed by the board's Zobrist hash and the rack as a sorted
+    multiset, and keep the board's tiles so that a hash collision is never
+    mistaken for a hit. The cap is on the estimated memory held by all entries
+    (see ENTRY_BYTES and MOVE_BYTES); least recently used entries are dropped
+    to stay under it.
+
+    Cached move lists are shared between callers and must not be modified.
+
+    Usage:
+        cache = TranspositionCache(dictionary)
+        moves = cache.find_all_options(board, rack)
+        score = cache.best_score(board, rack)
+    """
+
+    # Estimated memory of one entry (key, copy of the board's tiles, LRU bookkeeping) and of
+    # each move in a cached move list, measured with sys.getsizeof on 15x15 boards.
+    ENTRY_BYTES = 1024
+    MOVE_BYTES = 300
+
+    def __init__(self, dictionary, max_bytes=32 * 2 ** 20):
+        self.dictionary = dictionary
+        self.max_bytes = max_bytes
+        # (kind, board hash, sorted rack) -> (board tiles, moves or best score)
+        self._entries = OrderedDict()
+        self.bytes_held = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _lookup(self, key, board):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != board.tile_bytes():
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key, board, result):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes_held -= self._size(old[1])
+        self._entries[key] = (board.tile_bytes(), result)
+        self.bytes_held += self._size(result)
+        while self.bytes_held > self.max_bytes and len(self._entries) > 1:
+            _, (_, dropped) = self._entries.popitem(last=False)
+            self.bytes_held -= self._size(dropped)
+            self.evictions += 1
+
+    @classmethod
+    def _size(cls, result):
+        """Estimated bytes of an entry holding `result` (a move list or a best score)."""
+        moves = len(result) if isinstance(result, list) else 0
+        return cls.ENTRY_BYTES + moves * cls.MOVE_BYTES
+
+    def find_all_options(self, board, rack):
+        """
+        Returns:
+            list: The moves SolveState.find_all_options finds for the rack in sorted order
+        """
+        position = (board.zobrist_hash, tuple(sorted(rack)))
+        moves = self._lookup(('moves',) + position, board)
+        if moves is not None:
+            self.hits += 1
+            return moves
+        self.misses += 1
+        solver = make_solver(self.dictionary, board, list(position[1]))
+        solver.find_all_options()
+        self._store(('moves',) + position, board, solver.found_moves)
+        return solver.found_moves
+
+    def best_score(self, board, rack):
+        """
+        Returns:
+            int: SolveState.best_score for the position, taken from its move list if that is cached
+        """
+        position = (board.zobrist_hash, tuple(sorted(rack)))
+        moves = self._lookup(('moves',) + position, board)
+        if moves is not None:
+            self.hits += 1
+            return max((move[4] for move in moves), default=0)
+        score = self._lookup(('best',) + position, board)
+        if score is not None:
+            self.hits += 1
+            return score
+        self.misses += 1
+        score = make_solver(self.dictionary, board, list(position[1])).best_score()
+        self._store(('best',) + position, board, score)
+        return score
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_held = 0
+
+
+def random_board(dictionary, seed, num_moves=10):
+    """
+    Build a reproducible mid-game position by playing random legal moves.
+
+    Args:
+        dictionary: Lexicon to play with
+        seed (int): Seed for tile draws and move choices
+        num_moves (int): Number of moves to play after the opening word
+
+    Returns:
+        tuple: (board, rack) where rack is the next player's seven tiles
+    """
+    from game import ScrabbleBag
+
+    rng = random.Random(seed)
+    tiles = [letter for letter, count in ScrabbleBag.TILE_DISTRIBUTION.items() for _ in range(count)]
+    rng.shuffle(tiles)
+    board = Board(15)
+
+    rack = [tiles.pop() for _ in range(7)]
+    while True:
+        opening = next((''.join(perm) for length in range(7, 1, -1) for perm in permutations(rack, length)
+                        if dictionary.is_word(''.join(perm))), None)
+        if opening is not None:
+            break
+        tiles.extend(rack)
+        rng.shuffle(tiles)
+        rack = [tiles.pop() for _ in range(7)]
+    _, rack = board.place_word(opening, (7, 7 - len(opening) // 2), 'across', rack)
+
+    for _ in range(num_moves):
+        rack.extend(tiles.pop() for _ in range(min(7 - len(rack), len(tiles))))
+        solver = make_solver(dictionary, board, rack.copy())
+        solver.find_all_options()
+        if not solver.found_moves:
+            break
+        word, pos, direction, _, _ = rng.choice(solver.found_moves)
+        _, rack = board.place_word(word, pos, direction, rack)
+
+    rack.extend(tiles.pop() for _ in range(min(7 - len(rack), len(tiles))))
+    return board, rack
 
 
 if __name__ == '__main__':